@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Micro benchmarks of the JSON codecs of trustly.data.codec on typical
+# request and response payloads. Run from the top of the source tree:
+#
+#   python benchmarks/bench-codec.py
+
+from __future__ import print_function
+import sys
+import timeit
+
+sys.path.insert(0, '.')
+
+import trustly.data.codec
+
+def deposit_payload():
+    return dict(method='Deposit', version='1.1', params=dict(UUID='258a2184-2842-b485-25ca-293525152425',
+        Signature='x' * 344, Data=dict(Username='merchant', Password='secret',
+            NotificationURL='https://example.com/notify', EndUserID='user@example.com', MessageID='12345',
+            Attributes=dict(Locale='sv_SE', Amount='10.00', Currency='SEK', Country='SE',
+                IP='127.0.0.1', SuccessURL='https://example.com/success',
+                FailURL='https://example.com/fail', Firstname=u'Jörgen', Lastname='Smith'))))
+
+def view_payload():
+    return dict(version='1.1', result=dict(method='ViewAutomaticSettlementDetailsCSV',
+        uuid='258a2184-2842-b485-25ca-293525152425', signature='x' * 344, data=[
+            dict(orderid=str(4000000000 + i), amount='10.00', currency='SEK', messageid=str(i),
+                datestamp='2014-01-01 12:00:00.000000+00', accountid=None, gluepayid=i)
+            for i in range(1000)]))
+
+def bench(name, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    print('{0:<40} {1:>10.2f}us'.format(name, best / number * 1e6))
+
+def main():
+    cases = [
+        ('deposit request', deposit_payload(), 20000),
+        ('1000 row view response', view_payload(), 50),
+        ]
+    for (name, data, number) in cases:
+        for codec_name in trustly.data.codec.available_codecs():
+            codec = trustly.data.codec.get_codec(codec_name)
+            text = codec.dumps(data)
+            body = text.encode('utf-8')
+            bench('{0} dumps: {1}'.format(codec_name, name), lambda: codec.dumps(data), number)
+            bench('{0} loads: {1}'.format(codec_name, name), lambda: codec.loads(body), number)
+
+if __name__ == "__main__":
+    main()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
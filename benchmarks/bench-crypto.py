@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Sign and verify throughput of the RSA backends of trustly.api.cryptobackend
+# with the merchant test keys of tests/test-api.py. Run from the top of the
+# source tree:
+#
+#   python benchmarks/bench-crypto.py
+
+from __future__ import print_function
+import sys
+import timeit
+
+sys.path.insert(0, '.')
+
+import trustly.api.cryptobackend
+import trustly.api.serializer
+
+def load_test_keys():
+    namespace = {'__name__': 'test_api'}
+    with open('tests/test-api.py') as f:
+        exec(compile(f.read(), 'tests/test-api.py', 'exec'), namespace)
+    return [namespace['test_privatekey1'], namespace['test_privatekey2']]
+
+def bench(name, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    print('{0:<40} {1:>10.0f} ops/s'.format(name, number / best))
+
+def main():
+    digest = trustly.api.serializer.canonical_digest('Deposit', 'f1b77aac', {'Amount': '10.00'}).digest()
+    pycryptodome = trustly.api.cryptobackend.get_backend('pycryptodome')
+
+    for (i, pem) in enumerate(load_test_keys()):
+        publickey = pycryptodome.load_private(pem).publickey().exportKey(format='PEM')
+        for name in trustly.api.cryptobackend.available_backends():
+            backend = trustly.api.cryptobackend.get_backend(name)
+            key = backend.load_private(pem)
+            public = backend.load_public(publickey)
+            signature = backend.sign_sha1_pkcs1v15(key, digest)
+
+            bench('{0} sign, test key {1}'.format(name, i + 1),
+                    lambda: backend.sign_sha1_pkcs1v15(key, digest), 200)
+            bench('{0} verify, test key {1}'.format(name, i + 1),
+                    lambda: backend.verify_sha1_pkcs1v15(public, digest, signature), 2000)
+
+if __name__ == "__main__":
+    main()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Cold start benchmark: import of trustly.api.signed and construction of a
+# SignedAPI in a fresh interpreter, measured with -X importtime. Shows the
+# slowest imports and which of the heavy modules were loaded before the
+# first call. Run from the top of the source tree:
+#
+#   python benchmarks/bench-importtime.py
+
+from __future__ import print_function
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, '.')
+
+    # Modules imported only when needed for signing, verification or HTTP
+DEFERRED = ('Crypto.PublicKey.RSA', 'Crypto.Signature.PKCS1_v1_5', 'Crypto.Hash.SHA',
+        'http.client', 'concurrent.futures', 'uuid', 'pprint')
+
+SCRIPT = '''
+import sys, time
+start = time.time()
+import trustly.api.signed
+imported = time.time()
+api = trustly.api.signed.SignedAPI(merchant_privatekey={keyfile!r}, username='u', password='p',
+        host='test.trustly.com')
+constructed = time.time()
+loaded = [m for m in {deferred!r} if m in sys.modules]
+api.sign_merchant_digest(trustly.api.serializer.canonical_digest('Deposit', 'f1b77aac', {{}}))
+signed = time.time()
+print('TIMES', imported - start, constructed - imported, signed - constructed)
+print('LOADED', ' '.join(loaded))
+'''
+
+def generate_key():
+    from Crypto.PublicKey import RSA
+    return RSA.generate(2048).exportKey(format='PEM')
+
+def run(keyfile):
+    script = SCRIPT.format(keyfile=keyfile, deferred=DEFERRED)
+        # Run from the source tree in a fresh interpreter
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(['.'] + [p for p in [env.get('PYTHONPATH')] if p])
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', script],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    (out, err) = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(err.decode('utf-8', 'replace'))
+
+    imports = []
+    for line in err.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        (self_us, cumulative_us, name) = line[len('import time:'):].split('|')
+        imports.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    times = None
+    loaded = ''
+    for line in out.decode('utf-8').splitlines():
+        if line.startswith('TIMES'):
+            times = [float(t) for t in line.split()[1:]]
+        elif line.startswith('LOADED'):
+            loaded = line[len('LOADED'):].strip()
+    return (times, imports, loaded)
+
+def main():
+    with tempfile.NamedTemporaryFile(suffix='.pem', delete=False) as f:
+        f.write(generate_key())
+    try:
+        results = [run(f.name) for i in range(5)]
+    finally:
+        os.unlink(f.name)
+
+    (times, imports, loaded) = min(results, key=lambda r: sum(r[0]))
+    print('{0:<40} {1:>10.2f}ms'.format('import trustly.api.signed', times[0] * 1e3))
+    print('{0:<40} {1:>10.2f}ms'.format('SignedAPI()', times[1] * 1e3))
+    print('{0:<40} {1:>10.2f}ms'.format('first signature', times[2] * 1e3))
+    print()
+    print('Deferred modules loaded by import and SignedAPI(): {0}'.format(loaded or 'none'))
+    print()
+    print('Slowest imports (cumulative):')
+    for (cumulative_us, self_us, name) in sorted(imports, reverse=True)[:15]:
+        print('{0:<50} {1:>10.2f}ms'.format(name, cumulative_us / 1e3))
+
+if __name__ == "__main__":
+    main()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Startup benchmark of loading the merchant key from its PEM file against
+# loading it from a key snapshot (see trustly.api.keysnapshot). Times the
+# construction of a SignedAPI up to having a usable signer. Run from the top
+# of the source tree:
+#
+#   python benchmarks/bench-keysnapshot.py
+
+from __future__ import print_function
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, '.')
+
+from Crypto.PublicKey import RSA
+
+import trustly.api.signed
+
+def new_api(merchant_privatekey):
+    return trustly.api.signed.SignedAPI(merchant_privatekey=merchant_privatekey,
+            username='username', password='password', host='test.trustly.com')
+
+def bench(name, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    print('{0:<40} {1:>10.2f}ms'.format(name, best / number * 1e3))
+
+def main():
+    for bits in (2048, 4096):
+        pem = RSA.generate(bits).exportKey(format='PEM')
+        (fd, pemfile) = tempfile.mkstemp(suffix='.pem')
+        os.write(fd, pem)
+        os.close(fd)
+
+        snapshot = new_api(pem).export_key_snapshot()
+        (fd, snapshotfile) = tempfile.mkstemp(suffix='.keys')
+        os.write(fd, snapshot)
+        os.close(fd)
+
+        def from_pem():
+            new_api(pemfile).merchant_signer
+
+        def from_snapshot(use_mmap):
+            api = new_api(None)
+            api.load_key_snapshot(snapshotfile, use_mmap=use_mmap)
+            api.merchant_signer
+
+        try:
+            bench('{0} bits: PEM file'.format(bits), from_pem, 5)
+            bench('{0} bits: snapshot file'.format(bits), lambda: from_snapshot(False), 200)
+            bench('{0} bits: snapshot file, mmap'.format(bits), lambda: from_snapshot(True), 200)
+        finally:
+            os.unlink(pemfile)
+            os.unlink(snapshotfile)
+
+if __name__ == "__main__":
+    main()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
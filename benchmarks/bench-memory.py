@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Memory footprint of the request and response objects. Creates a batch of
+# each and reports the size of the instances themselves (including their
+# __dict__ if they have one) as well as all memory allocated per object,
+# payload and response bodies included. Requires python 3.4 or later for
+# tracemalloc. Run from the top of the source tree:
+#
+#   python benchmarks/bench-memory.py
+
+from __future__ import print_function
+import gc
+import sys
+import tracemalloc
+
+sys.path.insert(0, '.')
+
+import trustly.data.jsonrpcnotificationrequest
+import trustly.data.jsonrpcnotificationresponse
+import trustly.data.jsonrpcrequest
+import trustly.data.jsonrpcsignedresponse
+
+COUNT = 10000
+
+class Call(object):
+    status = 200
+    reason = 'OK'
+
+    def __init__(self, body):
+        self.body = body
+
+    def getresponse(self):
+        return self
+
+    def read(self):
+        return self.body
+
+response_body = b'{"version": "1.1", "result": {"method": "Deposit", "uuid": "x", "signature": "s", "data": {"orderid": "1", "url": "u"}}}'
+notification_body = '{"version": "1.1", "method": "credit", "params": {"uuid": "x", "signature": "s", "data": {"orderid": "1"}}}'
+
+def instance_size(o):
+    size = sys.getsizeof(o)
+    if hasattr(o, '__dict__'):
+        size += sys.getsizeof(o.__dict__)
+    return size
+
+def measure(name, factory):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory() for i in range(COUNT)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    instances = sum(instance_size(o) for o in objects)
+    print('{0:<30} instance {1:>6.1f} bytes, total {2:>7.1f} bytes per object'.format(name,
+        float(instances) / COUNT, float(total) / COUNT))
+    return objects
+
+def main():
+    measure('JSONRPCRequest', lambda: trustly.data.jsonrpcrequest.JSONRPCRequest(method='Deposit'))
+    measure('JSONRPCSignedResponse', lambda: trustly.data.jsonrpcsignedresponse.JSONRPCSignedResponse(Call(response_body)))
+    notification = trustly.data.jsonrpcnotificationrequest.JSONRPCNotificationRequest(notification_body)
+    measure('JSONRPCNotificationRequest', lambda: trustly.data.jsonrpcnotificationrequest.JSONRPCNotificationRequest(notification_body))
+    measure('JSONRPCNotificationResponse', lambda: trustly.data.jsonrpcnotificationresponse.JSONRPCNotificationResponse(notification, True))
+
+if __name__ == "__main__":
+    main()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
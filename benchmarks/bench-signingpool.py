@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Throughput of signing a batch of digests in the calling thread against
+# signing it in a trustly.api.signingpool.SigningPool, with the merchant test
+# key of tests/test-api.py. Run from the top of the source tree:
+#
+#   python benchmarks/bench-signingpool.py
+
+from __future__ import print_function
+import multiprocessing
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+import trustly.api.serializer
+import trustly.api.signed
+
+def load_test_key():
+    namespace = {'__name__': 'test_api'}
+    with open('tests/test-api.py') as f:
+        exec(compile(f.read(), 'tests/test-api.py', 'exec'), namespace)
+    return namespace['test_privatekey1']
+
+def bench(name, func, count):
+    best = None
+    for i in range(3):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    print('{0:<40} {1:>10.0f} signatures/s'.format(name, count / best))
+
+def main():
+    count = 2000
+    digests = [trustly.api.serializer.canonical_digest('AccountPayout', str(i), {'Amount': '1.00'})
+            for i in range(count)]
+    api = trustly.api.signed.SignedAPI(merchant_privatekey=load_test_key(), username='username',
+            password='password', host='test.trustly.com', signature_cache_size=0)
+
+    bench('serial', lambda: api.sign_many(digests), count)
+    for processes in sorted(set([2, multiprocessing.cpu_count()])):
+        api.use_signing_pool(processes)
+            # Start the workers before timing
+        api.sign_many(digests[:processes])
+        bench('pool, {0} processes'.format(processes), lambda: api.sign_many(digests), count)
+    api.use_signing_pool(0)
+
+if __name__ == "__main__":
+    main()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Micro benchmarks of trustly.data.vacuum.vacuum() against the recursive
+# implementation it replaced. Run from the top of the source tree:
+#
+#   python benchmarks/bench-vacuum.py
+
+from __future__ import print_function
+import sys
+import timeit
+
+import six
+
+sys.path.insert(0, '.')
+
+import trustly.data.vacuum
+
+    # The recursive Data.vacuum() of earlier versions
+def legacy_vacuum(data):
+    if type(data) == list:
+        ret = list()
+        for k in data:
+            if k is not None:
+                v = legacy_vacuum(k)
+                if v is not None:
+                    ret.append(v)
+
+        if len(ret) == 0:
+            return None
+
+        return ret
+
+    elif type(data) == dict:
+        ret = dict()
+        for (k, v) in six.iteritems(data):
+            if v is not None:
+                v = legacy_vacuum(v)
+                if v is not None:
+                    ret[k] = v
+
+        if len(ret) == 0:
+            return None
+
+        return ret
+    else:
+        return data
+
+def deposit_payload(with_none):
+    attributes = dict(Locale='sv_SE', Amount='10.00', Currency='SEK', Country='SE',
+            IP='127.0.0.1', SuccessURL='https://example.com/success',
+            FailURL='https://example.com/fail', Firstname='Steve', Lastname='Smith')
+    if with_none:
+        for k in ('TemplateURL', 'URLTarget', 'MobilePhone', 'NationalIdentificationNumber',
+                'ShopperStatement', 'SuggestedMinAmount', 'SuggestedMaxAmount',
+                'IntegrationModule', 'Email', 'ShippingAddressCountry',
+                'ShippingAddressPostalcode', 'ShippingAddressCity',
+                'ShippingAddressLine1', 'ShippingAddressLine2', 'ShippingAddress'):
+            attributes[k] = None
+    return dict(method='Deposit', params=dict(Data=dict(NotificationURL='https://example.com/notify',
+        EndUserID='user@example.com', MessageID='12345', Attributes=attributes)))
+
+def view_payload():
+    return dict(params=dict(Data=dict(ViewName='Transfers', Rows=[
+        dict(orderid=str(i), amount='10.00', currency='SEK', messageid=None if i % 10 else str(i),
+            datestamp='2014-01-01 12:00:00', accountid=None)
+        for i in range(1000)])))
+
+def deep_payload(depth):
+    data = []
+    current = data
+    for i in range(depth):
+        child = [None, i]
+        current.append(child)
+        current = child
+    return data
+
+def bench(name, func, data, number):
+    try:
+        best = min(timeit.repeat(lambda: func(data), number=number, repeat=5))
+    except RuntimeError:
+        print('{0:<40} {1:>12}'.format(name, 'recursion'))
+        return
+    print('{0:<40} {1:>10.2f}us'.format(name, best / number * 1e6))
+
+def main():
+    cases = [
+        ('deposit, no None', lambda: deposit_payload(False), 20000),
+        ('deposit, 15 None attributes', lambda: deposit_payload(True), 20000),
+        ('1000 row view, some None', view_payload, 50),
+        ('list nested 5000 deep', lambda: deep_payload(5000), 20),
+        ]
+    for (name, factory, number) in cases:
+        data = factory()
+        bench('legacy: ' + name, legacy_vacuum, data, number)
+        bench('vacuum: ' + name, trustly.data.vacuum.vacuum, data, number)
+            # In place vacuuming modifies the data, time it on fresh copies
+        copies = [factory() for i in range(5 * number)]
+        bench('vacuum inplace: ' + name, lambda d: trustly.data.vacuum.vacuum(copies.pop(), inplace=True), None, number)
+
+if __name__ == "__main__":
+    main()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -7,7 +7,8 @@ setup(name='trustly',
         author='Per lejontand',
         license='The MIT License (MIT)',
         packages=['trustly', 'trustly.data', 'trustly.api'],
-        install_requires=['uuid', 'pycrypto', 'six'],
+        install_requires=['uuid', 'pycryptodome', 'six', 'futures; python_version < "3"'],
+        extras_require={'cryptography': ['cryptography']},
         zip_safe=False,
         package_data={'trustly.api': [ 'keys/*.public.pem' ]}
         )
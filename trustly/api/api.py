@@ -23,73 +23,127 @@ THE SOFTWARE.
 """
 
 from __future__ import absolute_import
-import functools
-import pkgutil
+import time
 import types
 import base64
-import locale
 
-from Crypto.Signature import PKCS1_v1_5
-from Crypto.Hash import SHA
-from Crypto.PublicKey import RSA
 import six
-import six.moves.http_client
 
+import trustly.api.connectionpool
+import trustly.api.cryptobackend
+import trustly.api.history
+import trustly.api.keycache
+import trustly.api.keysnapshot
+import trustly.api.serializer
+import trustly.api.transport
 import trustly.exceptions
 import trustly.data.jsonrpcnotificationresponse
 import trustly.data.jsonrpcnotificationrequest
 
 class API(object):
-        # Last  data object of last request made, this is primarily here for
-        # debugging purpose or you for any other reason would like to know
-        # exactly what data we did just send
-    last_request = None
-
-        # Basic key management, the actual key and the imported class
-        # representation of the trustly keys used in the integration. All
-        # signed calls coming from trustly will be verified using this key
-    trustly_publickey = None
-    trustly_verifyer = None
+        # Keep the last request made by every thread (see get_last_request()),
+        # this is primarily here for debugging purpose or you for any other
+        # reason would like to know exactly what data we did just send. Set
+        # to False to not keep any request objects (and the credentials in
+        # them) alive after the call.
+    track_last_request = True
+
+        # trustly.api.history.History of summaries of the calls made, None
+        # unless enabled with enable_history()
+    history = None
+
+        # Basic key management, trustly.api.keycache.LazyKey holding the
+        # trustly key used in the integration. All signed calls coming from
+        # trustly will be verified using this key. The key is parsed when
+        # first used, see the trustly_publickey and trustly_verifyer
+        # properties.
+    _trustly_key = None
+
+        # trustly.api.cryptobackend.CryptoBackend used for the RSA signatures
+        # and verifications, None for the default backend
+    crypto_backend = None
 
         # Connection information for the API backend
     api_host = None
     api_port = None
     api_is_https = None
 
-    def __init__(self, host='trustly.com', port=443, is_https=True):
-        self.load_trustly_publickey(host, port)
+        # HTTP headers sent with every call
+    request_headers = {'Content-Type': 'application/json; charset=utf-8'}
+
+        # Transport used for the HTTP communication with the API backend, see
+        # trustly.api.transport. Defaults to httplib with pooled keep-alive
+        # connections.
+    transport = None
+        # Pool of keep-alive connections used by the default transport. Can
+        # be shared between several API instances by passing the same pool to
+        # the constructor.
+    connection_pool = None
+
+        # Serializer producing the plaintext for signatures
+    serializer = None
+
+        # Release the raw response bodies once parsed (see
+        # trustly.data.response.Response), set retain_response_body to keep
+        # them around for debugging in lazy mode.
+    lazy_responses = False
+    retain_response_body = None
+
+        # An already imported trustly_publickey (or LazyKey) for the host can
+        # be given to skip loading the key file, e.g. when creating several
+        # API instances for the same host.
+    def __init__(self, host='trustly.com', port=443, is_https=True, connection_pool=None, transport=None,
+            trustly_publickey=None):
+        self.serializer = trustly.api.serializer.Serializer()
+        self._last_request = self._new_last_request()
+        if trustly_publickey is None:
+            self.load_trustly_publickey(host, port)
+        else:
+            self.use_trustly_publickey(host, port, trustly_publickey)
         self.api_is_https = bool(is_https)
 
+        if transport is None:
+            if connection_pool is None:
+                connection_pool = trustly.api.connectionpool.ConnectionPool()
+            transport = trustly.api.transport.HTTPClientTransport(connection_pool=connection_pool)
+        self.connection_pool = connection_pool
+        self.transport = transport
+        self.transport.set_endpoint(self.api_host, self.api_port, self.api_is_https)
+
+        # Use the trustly public key for api_host:api_port, the parsed keys
+        # are shared process wide, see trustly.api.keycache
     def load_trustly_publickey(self, api_host, api_port):
-        trustly_pkey_str = None
-        try:
-            trustly_pkey_str = pkgutil.get_data('trustly.api', 'keys/{0}:{1}.public.pem'.format(api_host, api_port))
-        except IOError as e:
-            pass
-        if trustly_pkey_str is None:
-            trustly_pkey_str = pkgutil.get_data('trustly.api', 'keys/{0}.public.pem'.format(api_host))
+        self.use_trustly_publickey(api_host, api_port,
+                trustly.api.keycache.get_trustly_publickey(api_host, api_port))
+
+        # Use publickey, an imported RSA key or a LazyKey, for verifying the
+        # data signed by trustly at api_host:api_port
+    def use_trustly_publickey(self, api_host, api_port, publickey, verifier=None):
+        if not isinstance(publickey, trustly.api.keycache.LazyKey):
+            publickey = trustly.api.keycache.LazyKey(key=publickey, scheme=verifier)
 
         self.api_host = api_host
         self.api_port = api_port
-
-        self.trustly_publickey = RSA.importKey(trustly_pkey_str)
-        self.trustly_verifyer = PKCS1_v1_5.new(self.trustly_publickey)
-
+        self._trustly_key = publickey
+
+        # The imported RSA public key of trustly
+    @property
+    def trustly_publickey(self):
+        if self._trustly_key is None:
+            return None
+        return self._trustly_key.key
+
+        # PKCS#1 v1.5 verifier for trustly_publickey
+    @property
+    def trustly_verifyer(self):
+        if self._trustly_key is None:
+            return None
+        return self._trustly_key.scheme
+
+        # Serialize data into the form used for signatures, see
+        # trustly.api.serializer.Serializer
     def serialize_data(self, data=None):
-        ret = six.text_type('')
-        if type(data) == list:
-            for k in data:
-                ret = ret + self.serialize_data(k)
-        elif type(data) == dict:
-            if six.PY2:
-                for k in sorted(list(data.keys()), cmp=locale.strcoll):
-                    ret = ret + six.text_type(k) + self.serialize_data(data[k])
-            else:
-                for k in sorted(list(data.keys()), key=functools.cmp_to_key(locale.strcoll)):
-                    ret = ret + six.text_type(k) + self.serialize_data(data[k])
-        elif data is not None:
-            return six.text_type(data)
-        return ret
+        return self.serializer.serialize(data)
 
     def _verify_trustly_signed_data(self, method, uuid, signature, data):
         if method is None:
@@ -102,16 +156,21 @@ class API(object):
             return False
 
         decoded_signature = base64.b64decode(signature)
-        plaintext = method + uuid + self.serialize_data(data)
-        sha1hash = SHA.new(plaintext.encode('utf-8'))
+        sha1hash = trustly.api.serializer.canonical_digest(method, uuid, data, serializer=self.serializer)
+
+        backend = self.get_crypto_backend()
+        return backend.verify_sha1_pkcs1v15(self._trustly_key.handle(backend), sha1hash.digest(), decoded_signature)
 
-        return self.trustly_verifyer.verify(sha1hash, decoded_signature)
+    def get_crypto_backend(self):
+        if self.crypto_backend is not None:
+            return self.crypto_backend
+        return trustly.api.cryptobackend.default_backend()
 
     def verify_trustly_signed_response(self, response):
         method = response.get_method()
         uuid = response.get_uuid()
         signature = response.get_signature()
-        data = response.get_data()
+        data = response.get_data_view()
 
         return self._verify_trustly_signed_data(method, uuid, signature, data)
 
@@ -119,10 +178,38 @@ class API(object):
         method = notification.get_method()
         uuid = notification.get_uuid()
         signature = notification.get_signature()
-        data = notification.get_data()
+        data = notification.get_data_view()
 
         return self._verify_trustly_signed_data(method, uuid, signature, data)
 
+        # Return the keys in use, as a dict of names to LazyKey objects, for
+        # key snapshots (see trustly.api.keysnapshot)
+    def _snapshot_keys(self):
+        return {'trustly:{0}:{1}'.format(self.api_host, self.api_port): self._trustly_key}
+
+        # Return a key snapshot (see trustly.api.keysnapshot) of the keys in
+        # use. The snapshot can be given to use_key_snapshot() to skip the
+        # parsing of the keys when creating new API instances.
+    def export_key_snapshot(self):
+        return trustly.api.keysnapshot.dumps(self._snapshot_keys())
+
+        # Use the keys of the snapshot made by export_key_snapshot(), either
+        # the snapshot itself or the dict returned by
+        # trustly.api.keysnapshot.loads(). Keys for other hosts are ignored.
+    def use_key_snapshot(self, snapshot):
+        if not isinstance(snapshot, dict):
+            snapshot = trustly.api.keysnapshot.loads(snapshot)
+
+        key = snapshot.get('trustly:{0}:{1}'.format(self.api_host, self.api_port))
+        if key is not None:
+            self.use_trustly_publickey(self.api_host, self.api_port, key)
+        return snapshot
+
+        # Use the keys of the snapshot in the file filename, memory mapped if
+        # use_mmap is set
+    def load_key_snapshot(self, filename, use_mmap=False):
+        return self.use_key_snapshot(trustly.api.keysnapshot.load(filename, use_mmap=use_mmap))
+
     def set_host(self, host=None, port=None, is_https=None):
         if host is None:
             host = self.api_host
@@ -135,10 +222,15 @@ class API(object):
         if is_https is not None:
             self.api_is_https = is_https
 
+        if self.transport is not None:
+            self.transport.set_endpoint(self.api_host, self.api_port, self.api_is_https)
+
         # Connect an http/https connection to the API and return the httplib
         # connection from the connect. Will raise TrustlyConnectionError if the
-        # connection failed
+        # connection failed. Calls are made through self.transport, this is
+        # not used by call() and the connection is not taken from the pool.
     def connect(self):
+        import six.moves.http_client
         try:
             if self.api_is_https:
                 call = six.moves.http_client.HTTPSConnection(self.api_host, self.api_port)
@@ -195,38 +287,80 @@ class API(object):
     def insert_credentials(self, request):
         raise NotImplementedError()
 
+        # Insert the credentials into the request and return the encoded
+        # (bytes) body to send for it
+    def prepare_request(self, request):
+        self.insert_credentials(request)
+
+        def encode():
+            body = request.json()
+            if isinstance(body, six.text_type):
+                body = body.encode('utf-8')
+            return body
+
+        return request.cached('body', encode)
+
         # Issue the call to the API given the data in a subclass of
         # trustly.data.request.Request. Before calling
-        # self.insert_credentials() will be called to insert the appropriate
-        # API credentials for the call. And self.handle_response() will be
-        # called as a post processing of the result. Returns a subclass of
-        # trustly.data.response.Response
+        # self.prepare_request() will be called to insert the appropriate
+        # API credentials for the call and encode it. And
+        # self.handle_response() will be called as a post processing of the
+        # result. Returns a subclass of trustly.data.response.Response
     def call(self, request):
-        self.insert_credentials(request)
-        self.last_request = request
+        body = self.prepare_request(request)
+        if self.track_last_request:
+            self._last_request.set(request)
 
-        jsonstr = request.json()
+        url_path = self.url_path(request)
+        if self.history is None:
+            (status, reason, headers, body) = self.transport.send(url_path,
+                    body, self.request_headers)
 
-        url = self.url_path(request)
+            return self.handle_response(request, trustly.api.transport.HTTPResult(status, reason, headers, body))
+
+        started = time.time()
+        status = None
         try:
-            call = self.connect()
+            (status, reason, headers, response_body) = self.transport.send(url_path,
+                    body, self.request_headers)
 
-            ret = call.request('POST', url, jsonstr)
-        except trustly.exceptions.TrustlyConnectionError as e:
-            raise
+            response = self.handle_response(request, trustly.api.transport.HTTPResult(status, reason, headers, response_body))
         except Exception as e:
-            raise trustly.exceptions.TrustlyConnectionError(str(e))
+            self.history.record(request, url_path, body, started, time.time() - started, status=status, exception=e)
+            raise
+        self.history.record(request, url_path, body, started, time.time() - started, status=status, response=response)
+        return response
+
+    def _new_last_request(self):
+        return trustly.api.history.LastRequest()
 
-        return self.handle_response(request, call)
+        # Keep summaries of the maxsize last calls in self.history, see
+        # trustly.api.history.History. The summaries hold no request data or
+        # credentials. A maxsize of 0 or None disables the history.
+    def enable_history(self, maxsize=100):
+        if maxsize:
+            self.history = trustly.api.history.History(maxsize)
+        else:
+            self.history = None
+        return self.history
 
-        # Return the last trustly.data.request.Request class used to issue a
-        # call. Useful for debugging data actually transmitted to trustly.
+        # Return the last trustly.data.request.Request class used by the
+        # current thread to issue a call. Useful for debugging data actually
+        # transmitted to trustly. Always None if track_last_request is off.
         #
         # NOTE: This will contain bare login credentials, proper caution should
         # be done before dumping this to screen or a log file to ensure login
         # credentials are kept secret.
     def get_last_request(self):
-        return self.last_request
+        return self._last_request.get()
+
+    @property
+    def last_request(self):
+        return self.get_last_request()
+
+    @last_request.setter
+    def last_request(self, request):
+        self._last_request.set(request)
 
         # Utility function for setting boolean values in the call based upon "real" python boolean values
     def api_bool(self, value):
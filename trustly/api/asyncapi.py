@@ -0,0 +1,120 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+# Shared plumbing for the asyncio versions of the API classes. This module
+# requires python 3.7 or later.
+
+from __future__ import absolute_import
+import asyncio
+import time
+
+import trustly.api.asynctransport
+import trustly.api.history
+import trustly.api.transport
+
+class AsyncAPI(object):
+        # Non blocking transport used for the calls to the API
+    transport = None
+        # concurrent.futures.Executor used for the CPU heavy parts of a call
+        # (RSA signing and verification, JSON decoding). None will use the
+        # default executor of the event loop.
+    executor = None
+
+        # Mixin for the API classes, needs to be listed before the
+        # synchronous API class in the bases of the subclass. Needs to be
+        # called after the synchronous API constructor so the host
+        # information is set up.
+    def _init_async(self, transport=None, executor=None):
+        if transport is None:
+            transport = trustly.api.asynctransport.AsyncHTTPTransport()
+        transport.set_endpoint(self.api_host, self.api_port, self.api_is_https)
+
+        self.transport = transport
+        self.executor = executor
+
+    def set_host(self, host=None, port=None, is_https=None):
+        super(AsyncAPI, self).set_host(host=host, port=port, is_https=is_https)
+        if self.transport is not None:
+            self.transport.set_endpoint(self.api_host, self.api_port, self.api_is_https)
+
+        # Run the blocking function func(*args) in the executor and return
+        # the result
+    async def run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+        # Asynchronous version of trustly.api.api.API.call(). The request is
+        # prepared (and signed) as well as the response processed in the
+        # executor, only the network communication is done in the event
+        # loop.
+    async def call(self, request):
+        body = await self.run_blocking(self.prepare_request, request)
+        if self.track_last_request:
+            self._last_request.set(request)
+
+        url_path = self.url_path(request)
+        if self.history is None:
+            (status, reason, headers, body) = await self.transport.send(url_path,
+                    body, self.request_headers)
+
+            result = trustly.api.transport.HTTPResult(status, reason, headers, body)
+            return await self.run_blocking(self.handle_response, request, result)
+
+        started = time.time()
+        status = None
+        try:
+            (status, reason, headers, response_body) = await self.transport.send(url_path,
+                    body, self.request_headers)
+
+            result = trustly.api.transport.HTTPResult(status, reason, headers, response_body)
+            response = await self.run_blocking(self.handle_response, request, result)
+        except Exception as e:
+            self.history.record(request, url_path, body, started, time.time() - started, status=status, exception=e)
+            raise
+        self.history.record(request, url_path, body, started, time.time() - started, status=status, response=response)
+        return response
+
+        # The last request is tracked per task, the tasks of the event loop
+        # all run in the same thread
+    def _new_last_request(self):
+        return trustly.api.history.ContextLastRequest()
+
+    async def handle_notification(self, httpbody):
+        return await self.run_blocking(super(AsyncAPI, self).handle_notification, httpbody)
+
+    async def notification_response(self, notification, success=True):
+        return await self.run_blocking(super(AsyncAPI, self).notification_response, notification, success)
+
+        # Close all idle connections held by the transport
+    async def close(self):
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,131 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+# asyncio version of trustly.api.signed.SignedAPI. This module requires
+# python 3.7 or later.
+
+from __future__ import absolute_import
+import asyncio
+import inspect
+import uuid
+
+import trustly.api.asyncapi
+import trustly.api.asynctransport
+import trustly.api.asyncunsigned
+import trustly.api.signed
+
+    # All the API methods of SignedAPI (deposit(), withdraw(), refund() etc)
+    # are available with the same arguments, but return awaitables resolving
+    # to the response. Signing of the requests and verification of the
+    # responses are done in the executor so the event loop is never blocked
+    # by the RSA operations.
+class AsyncSignedAPI(trustly.api.asyncapi.AsyncAPI, trustly.api.signed.SignedAPI):
+
+    def __init__(self, merchant_privatekey, username, password, host='trustly.com', port=443, is_https=True,
+            transport=None, executor=None, signature_cache_size=1024):
+
+            # Hand the asynchronous transport to the synchronous
+            # constructor, it would set up a connection pool otherwise
+        if transport is None:
+            transport = trustly.api.asynctransport.AsyncHTTPTransport()
+        super(AsyncSignedAPI, self).__init__(merchant_privatekey=merchant_privatekey,
+                username=username, password=password,
+                host=host, port=port, is_https=is_https, transport=transport,
+                signature_cache_size=signature_cache_size)
+
+        self._init_async(transport=transport, executor=executor)
+
+    async def call(self, request):
+        if request.get_uuid() is None:
+            request.set_uuid(str(uuid.uuid1()))
+
+        return await super(AsyncSignedAPI, self).call(request)
+
+    def _new_unsigned_api(self):
+        return trustly.api.asyncunsigned.AsyncUnsignedAPI(username=self.api_username, password=self.api_password,
+                host=self.api_host, port=self.api_port, is_https=self.api_is_https,
+                transport=self.transport, executor=self.executor, trustly_publickey=self._trustly_key)
+
+    async def hello(self):
+            # The hello call is not signed, use the unsigned API sharing our
+            # transport to do the request
+        return await self.unsigned_api().hello()
+
+        # Asynchronous version of trustly.api.signed.SignedAPI.submit(), the
+        # call is issued in a task of the running event loop which is
+        # returned
+    def submit(self, method_name, **kwargs):
+        loop = asyncio.get_running_loop()
+        method = self._api_method(method_name)
+        return loop.create_task(method(**kwargs))
+
+        # Asynchronous version of trustly.api.signed.SignedAPI.call_many(),
+        # an asynchronous generator yielding (index, task) tuples as the
+        # calls complete, with at most max_workers calls in flight. With a
+        # signing pool the batches are built and signed in the executor.
+    async def call_many(self, requests, max_workers=None):
+        loop = asyncio.get_running_loop()
+        if max_workers is None:
+            max_workers = self.executor_max_workers
+
+        if self.signing_pool is None:
+            calls = (self._method_call(method_name, kwargs) for (method_name, kwargs) in requests)
+        else:
+            calls = self._presigned_calls(requests)
+        calls = enumerate(calls)
+        pending = {}
+        exhausted = False
+
+        while True:
+            while not exhausted and len(pending) < max_workers:
+                if self.signing_pool is None:
+                    item = next(calls, None)
+                else:
+                    item = await self.run_blocking(next, calls, None)
+                if item is None:
+                    exhausted = True
+                    break
+                (index, call) = item
+                pending[loop.create_task(self._run_call(call))] = index
+
+            if not pending:
+                return
+            (done, not_done) = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield (pending.pop(task), task)
+
+    async def _run_call(self, call):
+        result = call()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+        # Stop the signing pool and close the connections held by the
+        # transport. The executor is owned by the caller and left running.
+    async def shutdown(self):
+        self._close_signing_pool()
+        await self.transport.close()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
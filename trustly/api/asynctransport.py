@@ -0,0 +1,238 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Non blocking HTTP/1.1 transport for the asyncio clients. This module
+# requires python 3.7 or later.
+
+from __future__ import absolute_import
+import asyncio
+import ssl
+import time
+
+import trustly.exceptions
+
+class AsyncHTTPTransport(object):
+        # Connection information for the API backend
+    api_host = None
+    api_port = None
+    api_is_https = None
+
+        # Maximum number of connections kept per endpoint, idle connections
+        # older than idle_timeout seconds will be closed instead of reused.
+    maxsize = None
+    idle_timeout = None
+    timeout = None
+
+    def __init__(self, host=None, port=None, is_https=True, maxsize=10,
+            idle_timeout=60, timeout=None, ssl_context=None):
+        self.set_endpoint(host, port, is_https)
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+
+            # Idle (reader, writer, checkin timestamp) tuples per endpoint
+        self._idle = {}
+            # Semaphores limiting the number of connections per endpoint,
+            # created lazily as they need to be created inside the loop on
+            # older python versions
+        self._slots = {}
+
+    def set_endpoint(self, host, port, is_https=True):
+        self.api_host = host
+        self.api_port = port
+        self.api_is_https = bool(is_https)
+
+    def _ssl(self):
+        if not self.api_is_https:
+            return None
+        if self.ssl_context is None:
+            self.ssl_context = ssl.create_default_context()
+        return self.ssl_context
+
+    def _is_stale(self, reader, writer, checkin_time, now):
+        if self.idle_timeout is not None and now - checkin_time > self.idle_timeout:
+            return True
+            # The loop keeps reading idle connections, so a server side close
+            # shows up as EOF on the reader.
+        return reader.at_eof() or writer.is_closing()
+
+    def _close(self, writer):
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+    async def _checkout(self, key):
+        slots = self._slots.get(key)
+        if slots is None:
+            slots = asyncio.Semaphore(self.maxsize)
+            self._slots[key] = slots
+        await slots.acquire()
+
+        try:
+            idle = self._idle.get(key)
+            now = time.time()
+            while idle:
+                (reader, writer, checkin_time) = idle.pop()
+                if self._is_stale(reader, writer, checkin_time, now):
+                    self._close(writer)
+                else:
+                    return (reader, writer)
+
+            (host, port, is_https) = key
+            return await asyncio.open_connection(host, port, ssl=self._ssl())
+        except:
+            slots.release()
+            raise
+
+    def _checkin(self, key, reader, writer, reuse):
+        if reuse:
+            self._idle.setdefault(key, []).append((reader, writer, time.time()))
+        else:
+            self._close(writer)
+        self._slots[key].release()
+
+    async def _read_body(self, reader, headers):
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                line = await reader.readline()
+                size = int(line.split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                        # Skip any trailers
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            return (b''.join(chunks), True)
+
+        length = headers.get('content-length')
+        if length is not None:
+            return (await reader.readexactly(int(length)), True)
+
+            # No framing, the body is delimited by the server closing the
+            # connection.
+        return (await reader.read(), False)
+
+        # Read the status line and headers of a response, returns a
+        # (version, status, reason, headers) tuple
+    async def _read_head(self, reader):
+        statusline = await reader.readline()
+        if not statusline:
+            raise ConnectionError('Connection closed by server')
+        parts = statusline.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        version = parts[0]
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ''
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            (name, value) = line.decode('latin-1').split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+        return (version, status, reason, headers)
+
+    async def _exchange(self, reader, writer, url_path, body, headers):
+        host = self.api_host
+        if self.api_port != (443 if self.api_is_https else 80):
+            host = '{0}:{1}'.format(self.api_host, self.api_port)
+
+        lines = ['POST {0} HTTP/1.1'.format(url_path),
+                'Host: {0}'.format(host),
+                'Content-Length: {0}'.format(len(body))]
+        for (name, value) in headers.items():
+            lines.append('{0}: {1}'.format(name, value))
+        lines.append('\r\n')
+
+        writer.write('\r\n'.join(lines).encode('latin-1') + body)
+        await writer.drain()
+
+            # Skip any interim 1xx responses (100 Continue, 103 Early Hints
+            # etc), they have no body and are followed by the final response
+        while True:
+            (version, status, reason, response_headers) = await self._read_head(reader)
+            if status < 100 or status >= 200 or status == 101:
+                break
+
+        (response_body, framed) = await self._read_body(reader, response_headers)
+
+        connection = response_headers.get('connection', '').lower()
+        reuse = framed and connection != 'close' and \
+                (version != 'HTTP/1.0' or connection == 'keep-alive')
+
+        return (status, reason, response_headers, response_body, reuse)
+
+        # POST body to url_path on the configured endpoint and return a
+        # (status, reason, headers, body) tuple. Header names in the returned
+        # headers are lower case. Will raise TrustlyConnectionError if the
+        # call failed.
+    async def send(self, url_path, body, headers, timeout=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if timeout is None:
+            timeout = self.timeout
+
+            # The timeout covers the whole call, including waiting for a
+            # free connection slot and connecting
+        try:
+            return await asyncio.wait_for(self._send(url_path, body, headers), timeout)
+        except trustly.exceptions.TrustlyConnectionError:
+            raise
+        except Exception as e:
+            raise trustly.exceptions.TrustlyConnectionError(str(e) or type(e).__name__)
+
+    async def _send(self, url_path, body, headers):
+        key = (self.api_host, self.api_port, self.api_is_https)
+        try:
+            (reader, writer) = await self._checkout(key)
+        except Exception as e:
+            raise trustly.exceptions.TrustlyConnectionError(str(e) or type(e).__name__)
+
+        reuse = False
+        try:
+            (status, reason, response_headers, response_body, reuse) = await self._exchange(reader, writer,
+                    url_path, body, headers)
+        finally:
+            self._checkin(key, reader, writer, reuse)
+
+        return (status, reason, response_headers, response_body)
+
+        # Close all idle connections
+    async def close(self):
+        idle = self._idle
+        self._idle = {}
+        for connections in idle.values():
+            for (reader, writer, checkin_time) in connections:
+                self._close(writer)
+                try:
+                    await writer.wait_closed()
+                except Exception:
+                    pass
+
+# vim: set et cindent ts=4 ts=4 sw=4:
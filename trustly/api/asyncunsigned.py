@@ -0,0 +1,84 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+# asyncio version of trustly.api.unsigned.UnsignedAPI. This module requires
+# python 3.7 or later.
+
+from __future__ import absolute_import
+import six
+
+import trustly.api.asyncapi
+import trustly.api.asynctransport
+import trustly.api.unsigned
+import trustly.data.jsonrpcrequest
+import trustly.exceptions
+
+class AsyncUnsignedAPI(trustly.api.asyncapi.AsyncAPI, trustly.api.unsigned.UnsignedAPI):
+
+    def __init__(self, username, password, host='trustly.com', port=443, is_https=True,
+            transport=None, executor=None, trustly_publickey=None):
+
+            # Hand the asynchronous transport to the synchronous
+            # constructor, it would set up a connection pool otherwise
+        if transport is None:
+            transport = trustly.api.asynctransport.AsyncHTTPTransport()
+        super(AsyncUnsignedAPI, self).__init__(username=username, password=password,
+                host=host, port=port, is_https=is_https, transport=transport, trustly_publickey=trustly_publickey)
+
+        self._init_async(transport=transport, executor=executor)
+
+    async def new_session_cookie(self):
+        self.session_uuid = None
+
+        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='NewSessionCookie')
+
+        response = await super(AsyncUnsignedAPI, self).call(data)
+
+        if response.is_success():
+            self.session_uuid = response.get_result('sessionuuid')
+        else:
+            raise trustly.exceptions.TrustlyAuthentificationError()
+
+        return response
+
+        # Execute an arbitrary call to the unsigned API. Retrieve new session
+        # uuid unless we have already been given one
+    async def call(self, method, **kwargs):
+        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method=method)
+
+        for (key, val) in six.iteritems(kwargs):
+            data.set_param(key, val)
+
+        if not self.has_session_uuid():
+            await self.new_session_cookie()
+
+        return await super(AsyncUnsignedAPI, self).call(data)
+
+    async def hello(self):
+        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='Hello')
+
+        return await super(AsyncUnsignedAPI, self).call(data)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,222 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from __future__ import absolute_import
+import select
+import threading
+import time
+
+import six
+
+import trustly.exceptions
+
+class ConnectionPool(object):
+        # Maximum number of connections (idle and checked out) kept per
+        # (host, port, scheme) endpoint
+    maxsize = None
+        # Idle connections older than this (in seconds) are closed rather than
+        # reused. Trustly closes idle keep-alive connections on its side long
+        # before this would matter, but we do not want to hold sockets forever.
+    idle_timeout = None
+        # Socket timeout handed to new connections, None for the global default
+    timeout = None
+
+    def __init__(self, maxsize=10, idle_timeout=60, timeout=None):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._lock = threading.Condition(threading.Lock())
+            # Idle connections per endpoint, most recently used last. Each
+            # entry is a (connection, checkin timestamp) tuple
+        self._idle = {}
+            # Number of connections (idle and checked out) per endpoint
+        self._count = {}
+            # Connections handed out by checkout() and not yet returned,
+            # mapped to the endpoint they belong to
+        self._checked_out = {}
+
+    def _new_connection(self, host, port, is_https):
+            # Imported here, http.client is slow to import and not needed
+            # until the first call
+        import six.moves.http_client
+        try:
+            if is_https:
+                return six.moves.http_client.HTTPSConnection(host, port, timeout=self.timeout)
+            else:
+                return six.moves.http_client.HTTPConnection(host, port, timeout=self.timeout)
+        except Exception as e:
+            raise trustly.exceptions.TrustlyConnectionError(str(e))
+
+        # Check whether an idle connection can be used for another request. A
+        # connection that has not yet connected (or has been closed by
+        # httplib after a Connection: close response) will reconnect on its
+        # own. A connected socket that is readable while we are not waiting
+        # for a response has either been closed by the server or has garbage
+        # on it, either way it is not safe to reuse.
+    def _is_stale(self, connection, checkin_time, now):
+        if self.idle_timeout is not None and now - checkin_time > self.idle_timeout:
+            return True
+
+        sock = getattr(connection, 'sock', None)
+        if sock is None:
+            return False
+
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (ValueError, select.error, OSError):
+            return True
+        return len(readable) > 0
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+        # Fetch a connection to the given endpoint, reusing an idle keep-alive
+        # connection if a healthy one exists. If the pool already holds
+        # maxsize connections for the endpoint this will wait for one to be
+        # checked in, at most timeout seconds if given. Raises
+        # TrustlyConnectionError if no connection could be had.
+    def checkout(self, host, port, is_https, block=True, timeout=None):
+        key = (host, port, bool(is_https))
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        connection = None
+        reserved = False
+        stale = []
+        with self._lock:
+            while True:
+                idle = self._idle.get(key)
+                now = time.time()
+                while idle:
+                    (candidate, checkin_time) = idle.pop()
+                    if self._is_stale(candidate, checkin_time, now):
+                        self._count[key] -= 1
+                        stale.append(candidate)
+                    else:
+                        connection = candidate
+                        break
+
+                if connection is not None:
+                    break
+
+                if self.maxsize is None or self._count.get(key, 0) < self.maxsize:
+                    self._count[key] = self._count.get(key, 0) + 1
+                    reserved = True
+                    break
+
+                if not block:
+                    break
+
+                if deadline is None:
+                    self._lock.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._lock.wait(remaining)
+
+            if stale:
+                    # Closed connections free up slots for other waiters
+                self._lock.notify_all()
+
+        for s in stale:
+            self._close(s)
+
+        if connection is None:
+            if not reserved:
+                raise trustly.exceptions.TrustlyConnectionError('Connection pool for {0}:{1} is exhausted'.format(host, port))
+
+            try:
+                connection = self._new_connection(host, port, is_https)
+            except:
+                self._release_slot(key)
+                raise
+
+        with self._lock:
+            self._checked_out[connection] = key
+
+        return connection
+
+    def _release_slot(self, key):
+        with self._lock:
+            self._count[key] -= 1
+            self._lock.notify()
+
+        # Return a connection fetched with checkout() to the pool. If reuse is
+        # False (typically because the request failed half way and the state
+        # of the connection is unknown) the connection is closed instead.
+        # Connections not handed out by this pool are silently ignored.
+    def checkin(self, connection, reuse=True):
+        with self._lock:
+            key = self._checked_out.pop(connection, None)
+            if key is None:
+                return
+
+            now = time.time()
+            idle = self._idle.setdefault(key, [])
+            expired = []
+                # Evict connections that have been idle for too long, the
+                # oldest ones are at the start of the list
+            while idle and self.idle_timeout is not None and now - idle[0][1] > self.idle_timeout:
+                expired.append(idle.pop(0)[0])
+                self._count[key] -= 1
+
+            if reuse:
+                idle.append((connection, now))
+            else:
+                self._count[key] -= 1
+                expired.append(connection)
+            self._lock.notify_all()
+
+        for e in expired:
+            self._close(e)
+
+        # Close all idle connections. Connections currently checked out are
+        # left alone and will be closed or pooled as they are checked in.
+    def clear(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+            for (key, connections) in six.iteritems(idle):
+                self._count[key] -= len(connections)
+            self._lock.notify_all()
+
+        for connections in six.itervalues(idle):
+            for (connection, checkin_time) in connections:
+                self._close(connection)
+
+        # Return a tuple of the number of (idle, checked out) connections for
+        # the given endpoint
+    def size(self, host, port, is_https):
+        key = (host, port, bool(is_https))
+        with self._lock:
+            idle = len(self._idle.get(key, []))
+            return (idle, self._count.get(key, 0) - idle)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
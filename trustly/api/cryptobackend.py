@@ -0,0 +1,255 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# RSA backends for the PKCS#1 v1.5 SHA1 signatures of the API. The backend
+# based on the cryptography package (OpenSSL) is used if installed, falling
+# back on pycryptodome (or pycrypto). A backend can be pinned with
+# set_backend(), and register_backend() adds further implementations.
+#
+# Keys are passed around as the native key objects of the backend, see
+# trustly.api.keycache.LazyKey for keeping one per backend. Signatures are
+# made over the SHA1 digest of the plaintext, computed with hashlib.
+
+from __future__ import absolute_import
+import hashlib
+
+import six
+
+import trustly.registry
+
+    # ASN.1 object identifier of SHA1
+SHA1_OID = '1.3.14.3.2.26'
+
+    # SHA1 hash object of hashlib with the attributes the signature schemes
+    # of Crypto expect of their hash objects, so these can be used with
+    # Crypto.Signature.PKCS1_v1_5 as well
+class SHA1Hash(object):
+    __slots__ = ('_hash', )
+
+    oid = SHA1_OID
+    digest_size = 20
+    block_size = 64
+
+    def __init__(self, data=None, _hash=None):
+        if _hash is None:
+            _hash = hashlib.sha1()
+        self._hash = _hash
+        if data is not None:
+            self._hash.update(data)
+
+    def update(self, data):
+        self._hash.update(data)
+
+    def digest(self):
+        return self._hash.digest()
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def copy(self):
+        return SHA1Hash(_hash=self._hash.copy())
+
+    def new(self, data=None):
+        return SHA1Hash(data)
+
+class CryptoBackend(object):
+        # Name of the backend in the registry
+    name = None
+
+        # Return the native private key of the PEM encoded RSA private key
+        # pem. Raises ValueError if pem is not a valid key.
+    def load_private(self, pem):
+        raise NotImplementedError()
+
+        # Return the native public key of the PEM encoded RSA public key pem.
+        # Raises ValueError if pem is not a valid key.
+    def load_public(self, pem):
+        raise NotImplementedError()
+
+        # Return the native key of the RSA integer components (n, e) or (n,
+        # e, d, p, q[, u]) as exported by key_components(). The components
+        # are trusted, the key is not checked for consistency.
+    def construct(self, components):
+        raise NotImplementedError()
+
+        # Return the RSA integer components (n, e) of a public key or (n, e,
+        # d, p, q, u) of a private key, where u is the inverse of p mod q
+    def key_components(self, key):
+        raise NotImplementedError()
+
+        # Return the PKCS#1 v1.5 signature (bytes) of the SHA1 digest (bytes)
+        # with the private key
+    def sign_sha1_pkcs1v15(self, key, digest):
+        raise NotImplementedError()
+
+        # Return True if signature is a valid PKCS#1 v1.5 signature of the
+        # SHA1 digest with the public key key
+    def verify_sha1_pkcs1v15(self, key, digest, signature):
+        raise NotImplementedError()
+
+class PyCryptodomeBackend(CryptoBackend):
+    name = 'pycryptodome'
+
+    def __init__(self):
+        from Crypto.PublicKey import RSA
+        from Crypto.Signature import PKCS1_v1_5
+        self._RSA = RSA
+        self._PKCS1_v1_5 = PKCS1_v1_5
+
+    def load_private(self, pem):
+        return self._RSA.importKey(pem)
+
+    def load_public(self, pem):
+        return self._RSA.importKey(pem)
+
+    def construct(self, components):
+        components = tuple(components)
+        try:
+            return self._RSA.construct(components, consistency_check=False)
+        except TypeError:
+                # pycrypto has no consistency_check and does not check
+            return self._RSA.construct(components)
+
+    def key_components(self, key):
+        if key.has_private():
+            return (key.n, key.e, key.d, key.p, key.q, key.u)
+        return (key.n, key.e)
+
+    def sign_sha1_pkcs1v15(self, key, digest):
+        return self._PKCS1_v1_5.new(key).sign(_Digest(digest))
+
+    def verify_sha1_pkcs1v15(self, key, digest, signature):
+        return bool(self._PKCS1_v1_5.new(key).verify(_Digest(digest), signature))
+
+    # A precomputed SHA1 digest posing as a hash object for PKCS1_v1_5
+class _Digest(object):
+    __slots__ = ('_digest', )
+
+    oid = SHA1_OID
+    digest_size = 20
+
+    def __init__(self, digest):
+        self._digest = digest
+
+    def digest(self):
+        return self._digest
+
+class CryptographyBackend(CryptoBackend):
+    name = 'cryptography'
+
+    def __init__(self):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding, rsa, utils
+
+        self._InvalidSignature = InvalidSignature
+        self._serialization = serialization
+        self._rsa = rsa
+        self._padding = padding.PKCS1v15()
+        self._prehashed = utils.Prehashed(hashes.SHA1())
+
+    def load_private(self, pem):
+        if isinstance(pem, six.text_type):
+            pem = pem.encode('ascii')
+        key = self._serialization.load_pem_private_key(pem, password=None)
+        if not isinstance(key, self._rsa.RSAPrivateKey):
+            raise ValueError('Not an RSA private key')
+        return key
+
+    def load_public(self, pem):
+        if isinstance(pem, six.text_type):
+            pem = pem.encode('ascii')
+        key = self._serialization.load_pem_public_key(pem)
+        if not isinstance(key, self._rsa.RSAPublicKey):
+            raise ValueError('Not an RSA public key')
+        return key
+
+    def construct(self, components):
+        rsa = self._rsa
+        public_numbers = rsa.RSAPublicNumbers(components[1], components[0])
+        if len(components) == 2:
+            return public_numbers.public_key()
+
+        (n, e, d, p, q) = components[:5]
+        private_numbers = rsa.RSAPrivateNumbers(p, q, d, rsa.rsa_crt_dmp1(d, p),
+                rsa.rsa_crt_dmq1(d, q), rsa.rsa_crt_iqmp(p, q), public_numbers)
+        try:
+            return private_numbers.private_key(unsafe_skip_rsa_key_validation=True)
+        except TypeError:
+                # Versions before 39 always validate the key
+            return private_numbers.private_key()
+
+    def key_components(self, key):
+        if isinstance(key, self._rsa.RSAPrivateKey):
+            numbers = key.private_numbers()
+            public_numbers = numbers.public_numbers
+                # rsa_crt_iqmp(q, p) is the inverse of p mod q
+            return (public_numbers.n, public_numbers.e, numbers.d, numbers.p, numbers.q,
+                    self._rsa.rsa_crt_iqmp(numbers.q, numbers.p))
+        numbers = key.public_numbers()
+        return (numbers.n, numbers.e)
+
+    def sign_sha1_pkcs1v15(self, key, digest):
+        return key.sign(digest, self._padding, self._prehashed)
+
+    def verify_sha1_pkcs1v15(self, key, digest, signature):
+        try:
+            key.verify(signature, digest, self._padding, self._prehashed)
+        except self._InvalidSignature:
+            return False
+        return True
+
+    # Backend classes by name, in order of preference
+_backends = trustly.registry.Registry([
+    ('cryptography', CryptographyBackend),
+    ('pycryptodome', PyCryptodomeBackend),
+    ], missing='No RSA library found, install cryptography or pycryptodome')
+
+    # Add a backend class (or other callable returning a CryptoBackend) to
+    # the registry. Unless prefer is true it is only used when pinned with
+    # set_backend().
+def register_backend(name, factory, prefer=False):
+    _backends.register(name, factory, prefer)
+
+    # Return the backend registered under name, raises ImportError if the
+    # library it needs is not installed and KeyError for unknown names
+def get_backend(name=None):
+    return _backends.get(name)
+
+    # Return the names of the registered backends that can be used
+def available_backends():
+    return _backends.available()
+
+    # Return the backend in use, the first usable one of the registry unless
+    # one has been pinned with set_backend()
+def default_backend():
+    return _backends.default()
+
+    # Pin the backend to use, either a CryptoBackend or the name of a
+    # registered backend. None reverts to automatic selection. Returns the
+    # backend. Raises ImportError if no backend can be used.
+def set_backend(backend):
+    return _backends.set(backend)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
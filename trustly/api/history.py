@@ -0,0 +1,123 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Debugging aids for the API classes: a bounded history of call summaries
+# and per thread tracking of the last request issued.
+
+from __future__ import absolute_import
+import collections
+import threading
+
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+
+    # Summary of a call made through trustly.api.api.API.call(). Only the
+    # identifying parts of the request and response are kept, never the
+    # request data or the credentials in it. exception is the class name of
+    # the exception raised by the call, if any.
+CallSummary = collections.namedtuple('CallSummary', ['method', 'uuid', 'url_path',
+    'request_size', 'started', 'elapsed', 'status', 'error_code', 'error_message', 'exception'])
+
+    # Thread safe ring buffer of the maxsize last CallSummary records
+class History(object):
+    maxsize = None
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._entries = collections.deque(maxlen=maxsize)
+
+        # Summarize a call and add it to the history, dropping the oldest
+        # record if full. response is the response object if the call
+        # completed, exception the exception raised otherwise. A response
+        # error that cannot be read is recorded without code and message, the
+        # history should never fail a call that completed.
+    def record(self, request, url_path, body, started, elapsed, status=None, response=None, exception=None):
+        error_code = None
+        error_message = None
+        if response is not None:
+            try:
+                if response.is_error():
+                    error_code = response.get_error_code()
+                    error_message = response.get_error_message()
+            except Exception:
+                pass
+
+        if exception is not None:
+            exception = type(exception).__name__
+
+        self._entries.append(CallSummary(request.get_method(), request.get_uuid(), url_path,
+            len(body), started, elapsed, status, error_code, error_message, exception))
+
+        # Return a list of the recorded CallSummary records, oldest first
+    def entries(self):
+        return list(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.entries())
+
+    # Last request issued, tracked separately for every thread so concurrent
+    # callers sharing an API instance each see their own
+class LastRequest(object):
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self):
+        return getattr(self._local, 'request', None)
+
+    def set(self, request):
+        self._local.request = request
+
+    # (tracker, request) of the last request made in the current context by
+    # any ContextLastRequest. Context variables should be created once per
+    # process, not per tracker.
+_context_request = None
+if contextvars is not None:
+    _context_request = contextvars.ContextVar('trustly_last_request', default=(None, None))
+
+    # As LastRequest, but tracked per asyncio task when contextvars is
+    # available (python 3.7 or later). Outside of the task that made it
+    # (e.g. after run_until_complete()) the last request made in the thread
+    # is returned.
+class ContextLastRequest(LastRequest):
+    def get(self):
+        if _context_request is not None:
+            (tracker, request) = _context_request.get()
+            if tracker is self:
+                return request
+        return super(ContextLastRequest, self).get()
+
+    def set(self, request):
+        super(ContextLastRequest, self).set(request)
+        if _context_request is not None:
+            _context_request.set((self, request))
+
+# vim: set et cindent ts=4 ts=4 sw=4:
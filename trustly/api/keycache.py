@@ -0,0 +1,152 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Process wide cache of the trustly public keys shipped in trustly/api/keys.
+# Parsing the PEM files is by far the most expensive part of creating an API
+# instance, the keys are only read once per host and port and shared by all
+# API instances. The keys are parsed on first use, see LazyKey.
+
+from __future__ import absolute_import
+import pkgutil
+import threading
+
+import trustly.api.cryptobackend
+
+    # An RSA key, parsed from the PEM text on first use. The crypto libraries
+    # are not imported until then either. The raw RSA integer components of
+    # the key, (n, e) or (n, e, d, p, q[, u]), as read from a key snapshot
+    # (see trustly.api.keysnapshot) can be given instead of the PEM text, or
+    # an already imported Crypto.PublicKey.RSA key (and PKCS1_v1_5 scheme).
+    #
+    # The key is parsed separately for every crypto backend it is used with
+    # (see trustly.api.cryptobackend), handle() returns the native key of a
+    # backend.
+class LazyKey(object):
+    def __init__(self, pem=None, key=None, scheme=None, components=None, private=None):
+        self.pem = pem
+        self.components = components
+        if private is None:
+            if components is not None:
+                private = len(components) > 2
+            elif key is not None:
+                private = key.has_private()
+            else:
+                private = False
+        self.private = private
+        self._key = key
+        self._scheme = scheme
+            # Native keys per backend name
+        self._handles = {}
+
+        # Return the native key of the backend (the default backend if not
+        # given)
+    def handle(self, backend=None):
+        if backend is None:
+            backend = trustly.api.cryptobackend.default_backend()
+
+            # Parsing twice in concurrent threads is harmless, the keys are
+            # equal
+        handle = self._handles.get(backend.name)
+        if handle is None:
+            if self._key is not None and backend.name == 'pycryptodome':
+                handle = self._key
+            elif self.components is not None:
+                handle = backend.construct(self.components)
+            elif self.pem is not None:
+                if self.private:
+                    handle = backend.load_private(self.pem)
+                else:
+                    handle = backend.load_public(self.pem)
+            else:
+                handle = backend.construct(self.get_components())
+            self._handles[backend.name] = handle
+        return handle
+
+        # Return the RSA integer components of the key, see
+        # trustly.api.cryptobackend.CryptoBackend.key_components()
+    def get_components(self):
+        if self.components is not None:
+            return self.components
+        if self._key is not None:
+            backend = trustly.api.cryptobackend.get_backend('pycryptodome')
+            return backend.key_components(self._key)
+        backend = trustly.api.cryptobackend.default_backend()
+        return backend.key_components(self.handle(backend))
+
+        # The imported RSA key (Crypto.PublicKey.RSA)
+    @property
+    def key(self):
+        key = self._key
+        if key is None:
+            key = self.handle(trustly.api.cryptobackend.get_backend('pycryptodome'))
+            self._key = key
+        return key
+
+        # PKCS#1 v1.5 signer/verifier for the key (Crypto.Signature.PKCS1_v1_5)
+    @property
+    def scheme(self):
+        scheme = self._scheme
+        if scheme is None:
+            from Crypto.Signature import PKCS1_v1_5
+            scheme = PKCS1_v1_5.new(self.key)
+            self._scheme = scheme
+        return scheme
+
+_lock = threading.Lock()
+    # LazyKey objects per 'host:port'
+_keys = {}
+
+def _load(api_host, api_port):
+    trustly_pkey_str = None
+    try:
+        trustly_pkey_str = pkgutil.get_data('trustly.api', 'keys/{0}:{1}.public.pem'.format(api_host, api_port))
+    except IOError as e:
+        pass
+    if trustly_pkey_str is None:
+        trustly_pkey_str = pkgutil.get_data('trustly.api', 'keys/{0}.public.pem'.format(api_host))
+
+    return LazyKey(pem=trustly_pkey_str)
+
+    # Return a LazyKey with the RSA public key of trustly at
+    # api_host:api_port. Raises IOError if there is no key for the host.
+def get_trustly_publickey(api_host, api_port):
+    key = '{0}:{1}'.format(api_host, api_port)
+    ret = _keys.get(key)
+    if ret is None:
+        ret = _load(api_host, api_port)
+        with _lock:
+            ret = _keys.setdefault(key, ret)
+    return ret
+
+    # Drop the cached key for api_host:api_port, or all cached keys if no
+    # host is given. API instances keep using the key they already have
+    # until set_host() is called.
+def invalidate_trustly_publickey(api_host=None, api_port=None):
+    with _lock:
+        if api_host is None:
+            _keys.clear()
+        else:
+            _keys.pop('{0}:{1}'.format(api_host, api_port), None)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
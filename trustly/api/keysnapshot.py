@@ -0,0 +1,167 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Snapshots of imported RSA keys as their raw integer components. Loading a
+# key from a snapshot skips the PEM, base64 and ASN.1 decoding as well as
+# the consistency checks of the key import, which makes it about a hundred
+# times faster than importing the PEM file of a private key.
+#
+# The snapshot format is the magic MAGIC followed by the keys, each one as
+#
+#   name length (uint16) | name (UTF-8) | number of components (uint8) |
+#   for every component: length (uint32) | component (big endian)
+#
+# with all lengths in network byte order. Private keys have the components
+# (n, e, d, p, q, u), public keys (n, e).
+#
+# NOTE: A snapshot of a private key holds the key in the clear. dump()
+# creates the file readable by the owner only, snapshots stored elsewhere
+# should be protected as the PEM file they were made from.
+
+from __future__ import absolute_import
+import binascii
+import mmap
+import os
+import struct
+
+import six
+
+import trustly.api.keycache
+
+MAGIC = b'TRUSTLYKEYS\x01'
+
+_name_header = struct.Struct('>H')
+_count_header = struct.Struct('>B')
+_component_header = struct.Struct('>I')
+
+def _to_bytes(i):
+    h = '{0:x}'.format(i)
+    if len(h) % 2:
+        h = '0' + h
+    return binascii.unhexlify(h)
+
+if hasattr(int, 'from_bytes'):
+    def _from_bytes(b):
+        return int.from_bytes(b, 'big')
+else:
+    def _from_bytes(b):
+        return int(binascii.hexlify(b), 16)
+
+    # Encode keys, a dict mapping names to LazyKey objects (or imported
+    # Crypto.PublicKey.RSA keys), into a snapshot
+def dumps(keys):
+    ret = [MAGIC]
+    for name in sorted(keys):
+        key = keys[name]
+        if not isinstance(key, trustly.api.keycache.LazyKey):
+            key = trustly.api.keycache.LazyKey(key=key)
+
+        encoded_name = six.text_type(name).encode('utf-8')
+        ret.append(_name_header.pack(len(encoded_name)))
+        ret.append(encoded_name)
+
+        components = key.get_components()
+        ret.append(_count_header.pack(len(components)))
+        for c in components:
+            b = _to_bytes(c)
+            ret.append(_component_header.pack(len(b)))
+            ret.append(b)
+    return b''.join(ret)
+
+    # Decode a snapshot (bytes or any buffer) into a dict mapping the names
+    # to trustly.api.keycache.LazyKey objects. Raises ValueError if the
+    # snapshot is malformed.
+def loads(data):
+    view = memoryview(data)
+    try:
+        return _parse(view)
+    except struct.error:
+        raise ValueError('Truncated key snapshot')
+    finally:
+            # Release the buffer so a memory map can be closed
+        if hasattr(view, 'release'):
+            view.release()
+
+def _parse(data):
+    if data[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError('Not a key snapshot')
+
+    ret = {}
+    offset = len(MAGIC)
+    while offset < len(data):
+        (length, ) = _name_header.unpack_from(data, offset)
+        offset += _name_header.size
+        name = data[offset:offset + length].tobytes().decode('utf-8')
+        offset += length
+
+        (count, ) = _count_header.unpack_from(data, offset)
+        offset += _count_header.size
+        if count not in (2, 6):
+            raise ValueError('Bad number of components for key {0} in snapshot'.format(name))
+
+        components = []
+        for i in range(count):
+            (length, ) = _component_header.unpack_from(data, offset)
+            offset += _component_header.size
+            if offset + length > len(data):
+                raise ValueError('Truncated key snapshot')
+            components.append(_from_bytes(data[offset:offset + length].tobytes()))
+            offset += length
+
+            # Cheap sanity check of the private keys, the full consistency
+            # check is skipped when constructing the keys
+        if count == 6 and components[0] != components[3] * components[4]:
+            raise ValueError('Inconsistent key {0} in snapshot'.format(name))
+
+        ret[name] = trustly.api.keycache.LazyKey(components=tuple(components))
+    return ret
+
+    # Write keys as a snapshot to the file filename. The file is created (or
+    # truncated and restricted if it exists) with mode 0600.
+def dump(keys, filename):
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o600)
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, 0o600)
+        f = os.fdopen(fd, 'wb')
+    except:
+        os.close(fd)
+        raise
+    with f:
+        f.write(dumps(keys))
+
+    # Read the snapshot in the file filename, memory mapped if use_mmap is
+    # set
+def load(filename, use_mmap=False):
+    with open(filename, 'rb') as f:
+        if not use_mmap:
+            return loads(f.read())
+
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return loads(m)
+        finally:
+            m.close()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
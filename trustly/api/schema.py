@@ -0,0 +1,212 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Declarative description of the requests of the signed API methods. Each
+# MethodSchema lists the Data and Data.Attributes fields of a method and
+# builds requests holding only the fields actually given, so the request
+# never has to be vacuumed. New API methods are added to SIGNED_METHODS and
+# can then be issued through trustly.api.signed.SignedAPI.call_method().
+
+from __future__ import absolute_import
+import six
+
+import trustly.data.jsonrpcrequest
+import trustly.data.vacuum
+
+    # Field kinds. VALUE fields are sent as given, FLAG fields are sent as 1
+    # if true and left out otherwise and BOOL fields are sent as '1' or '0'
+    # (see trustly.api.api.API.api_bool()).
+VALUE = 0
+FLAG = 1
+BOOL = 2
+
+    # Values sent as they are, anything else is vacuumed before being sent
+_plain_types = (six.text_type, six.binary_type, float, bool) + six.integer_types
+
+    # A field of a request. name is the name of the field in the API, the
+    # keyword argument is the lower case version of it.
+class Field(object):
+    name = None
+    argument = None
+    kind = None
+    required = None
+
+    def __init__(self, name, kind=VALUE, required=False):
+        self.name = name
+        self.argument = name.lower()
+        self.kind = kind
+        self.required = required
+
+    # Shorthand for a required VALUE field
+def required(name):
+    return Field(name, required=True)
+
+class MethodSchema(object):
+        # Name of the API method, e.g. 'Deposit'
+    method = None
+        # Field objects of params.Data and params.Data.Attributes
+    data = None
+    attributes = None
+        # Names of the keyword arguments that must be given
+    required = None
+
+    def __init__(self, method, data, attributes=()):
+        self.method = method
+        self.data = tuple(self._field(f) for f in data)
+        self.attributes = tuple(self._field(f) for f in attributes)
+        self.required = tuple(f.argument for f in self.data + self.attributes if f.required)
+
+        self._data = tuple((f.argument, f.name, f.kind) for f in self.data)
+        self._attributes = tuple((f.argument, f.name, f.kind) for f in self.attributes)
+
+    def _field(self, field):
+        if isinstance(field, six.string_types):
+            return Field(field)
+        return field
+
+    def _collect(self, fields, values):
+        ret = {}
+        for (argument, name, kind) in fields:
+            value = values.get(argument)
+            if value is None:
+                continue
+
+            if kind == FLAG:
+                if value:
+                    ret[name] = 1
+            elif kind == BOOL:
+                ret[name] = '1' if value else '0'
+            elif type(value) in _plain_types:
+                ret[name] = value
+            else:
+                value = trustly.data.vacuum.vacuum(value)
+                if value is not None:
+                    ret[name] = value
+        return ret
+
+        # Return a trustly.data.jsonrpcrequest.JSONRPCRequest for the method
+        # with the fields found in the mapping values (keyed on the keyword
+        # argument names). None values are left out.
+    def build(self, values):
+        data = self._collect(self._data, values)
+        attributes = self._collect(self._attributes, values)
+        if attributes:
+            data['Attributes'] = attributes
+
+        request = trustly.data.jsonrpcrequest.JSONRPCRequest(method=self.method)
+        if data:
+            request.set_param('Data', data)
+        return request
+
+        # Check that values holds the required arguments and only known
+        # arguments, raises TypeError otherwise.
+    def check(self, values):
+        for argument in self.required:
+            if argument not in values:
+                raise TypeError('{0} is missing the required argument {1}'.format(self.method, argument))
+
+        arguments = set(f.argument for f in self.data + self.attributes)
+        for argument in values:
+            if argument not in arguments:
+                raise TypeError('{0} got an unexpected argument {1}'.format(self.method, argument))
+
+SIGNED_METHODS = dict((schema.method, schema) for schema in (
+    MethodSchema('Deposit',
+        data=(required('NotificationURL'), required('EndUserID'), required('MessageID')),
+        attributes=('Locale', 'Amount', 'Currency', 'Country', 'IP',
+            'SuccessURL', 'FailURL', 'TemplateURL', 'URLTarget',
+            'MobilePhone', 'Firstname', 'Lastname',
+            'NationalIdentificationNumber', 'ShopperStatement',
+            'SuggestedMinAmount', 'SuggestedMaxAmount', 'IntegrationModule',
+            'Email', 'ShippingAddressCountry', 'ShippingAddressPostalcode',
+            'ShippingAddressCity', 'ShippingAddressLine1',
+            'ShippingAddressLine2', 'ShippingAddress',
+            Field('HoldNotifications', FLAG),
+            Field('UnchangeableNationalIdentificationNumber', FLAG))),
+
+    MethodSchema('Withdraw',
+        data=(required('NotificationURL'), required('EndUserID'), required('MessageID'),
+            required('Currency')),
+        attributes=('Locale', 'Country', 'IP', 'TemplateURL',
+            'ClearingHouse', 'BankNumber', 'AccountNumber',
+            'Firstname', 'Lastname', 'MobilePhone',
+            'NationalIdentificationNumber', 'Email', 'DateOfBirth',
+            'AddressCountry', 'AddressPostalcode', 'AddressCity',
+            'AddressLine1', 'AddressLine2', 'Address',
+            Field('HoldNotifications', FLAG))),
+
+    MethodSchema('Refund',
+        data=(required('OrderID'), required('Amount'), required('Currency'))),
+
+    MethodSchema('DenyWithdrawal',
+        data=(required('OrderID'), )),
+
+    MethodSchema('ApproveWithdrawal',
+        data=(required('OrderID'), )),
+
+    MethodSchema('SelectAccount',
+        data=(required('NotificationURL'), required('EndUserID'), required('MessageID')),
+        attributes=('Locale', 'Country', 'IP', 'SuccessURL', 'FailURL',
+            'TemplateURL', 'URLTarget', 'MobilePhone', 'Firstname',
+            'Lastname', 'Email', 'DateOfBirth',
+            Field('HoldNotifications', FLAG),
+            Field('RequestDirectDebitMandate', FLAG))),
+
+    MethodSchema('RegisterAccount',
+        data=(required('EndUserID'), required('ClearingHouse'), required('BankNumber'),
+            required('AccountNumber'), required('Firstname'), required('Lastname')),
+        attributes=('MobilePhone', 'NationalIdentificationNumber', 'Email',
+            'DateOfBirth', 'AddressCountry', 'AddressPostalcode',
+            'AddressCity', 'AddressLine1', 'AddressLine2', 'Address',
+            Field('HoldNotifications', FLAG))),
+
+    MethodSchema('AccountPayout',
+        data=(required('NotificationURL'), required('AccountID'), required('EndUserID'),
+            required('MessageID'), required('Amount'), required('Currency'))),
+
+    MethodSchema('P2P',
+        data=(required('NotificationURL'), required('EndUserID'), required('MessageID')),
+        attributes=(Field('AuthorizeOnly', BOOL), 'TemplateData', 'Locale',
+            'Amount', 'Currency', 'Country', 'IP', 'SuccessURL', 'FailURL',
+            'TemplateURL', 'URLTarget', 'MobilePhone', 'Firstname',
+            'Lastname', 'NationalIdentificationNumber', 'ShopperStatement',
+            'SuggestedMinAmount', 'SuggestedMaxAmount', 'IntegrationModule',
+            Field('HoldNotifications', FLAG))),
+
+    MethodSchema('Capture',
+        data=(required('OrderID'), required('Amount'), required('Currency'))),
+
+    MethodSchema('Void',
+        data=(required('OrderID'), )),
+
+    MethodSchema('Charge',
+        data=(required('AccountID'), required('NotificationURL'), required('EndUserID'),
+            required('MessageID'), required('Amount'), required('Currency')),
+        attributes=('ShopperStatement', )),
+
+    MethodSchema('GetWithdrawals',
+        data=(required('OrderID'), )),
+    ))
+
+# vim: set et cindent ts=4 ts=4 sw=4:
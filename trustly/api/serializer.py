@@ -0,0 +1,425 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+from __future__ import absolute_import
+import json
+import json.encoder
+import locale
+import re
+
+import six
+
+import trustly.api.cache
+import trustly.api.cryptobackend
+import trustly.api.template
+import trustly.data.data
+
+    # Number of plaintext pieces (keys and values) buffered before being
+    # encoded and fed to the hash when computing digests
+DIGEST_CHUNK_SIZE = 4096
+
+    # Keys matching this are memoized by Collation, the key vocabulary of the
+    # Trustly API is small and made up entirely of these.
+_identifier_re = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+    # True if the LC_COLLATE locale name is one of the C/POSIX locales
+    # (including C.UTF-8 and the like), which collate in code point order
+def _is_codepoint_locale(name):
+    return name.split('.', 1)[0].split('@', 1)[0] in ('C', 'POSIX')
+
+    # Collation order for the keys of serialized dicts. The Trustly
+    # specification orders keys with the locale collation (strcoll()), this
+    # follows the LC_COLLATE locale of the process as it is when sorting
+    # (strxfrm() gives no way of using any other). In the C/POSIX locales
+    # this is plain code point order and the keys are sorted natively,
+    # otherwise the keys are sorted on their strxfrm() transformation, which
+    # orders the same as strcoll() without calling back into python for
+    # every comparison. The transformations of identifier-like keys are
+    # memoized until the locale changes, see refresh().
+class Collation(object):
+        # Name of the LC_COLLATE locale the collation was last refreshed for
+    locale_name = None
+        # True if the collation is code point order
+    is_codepoint = None
+        # Maximum number of memoized strxfrm() keys
+    maxsize = None
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._xfrm_keys = {}
+        self.refresh()
+
+        # Pick up a change of the LC_COLLATE locale, dropping the memoized
+        # transformations. Returns True if the locale changed.
+    def refresh(self):
+        name = locale.setlocale(locale.LC_COLLATE)
+        if name == self.locale_name:
+            return False
+        self._xfrm_keys = {}
+        self.is_codepoint = _is_codepoint_locale(name)
+        self.locale_name = name
+        return True
+
+    def _xfrm(self, k):
+        try:
+            return self._xfrm_keys[k]
+        except KeyError:
+            pass
+
+        x = locale.strxfrm(k)
+        if len(self._xfrm_keys) < self.maxsize and _identifier_re.match(k):
+            self._xfrm_keys[k] = x
+        return x
+
+        # Return a list of the keys of data in collation order
+    def sorted_keys(self, data):
+        self.refresh()
+        if six.PY2:
+                # strxfrm() does not handle unicode in python 2
+            return sorted(data.keys(), cmp=locale.strcoll)
+        if self.is_codepoint:
+            return sorted(data)
+        return sorted(data, key=self._xfrm)
+
+    # Serialization of data structures into the plaintext that is signed in
+    # the Trustly API, see
+    # https://eu.developers.trustly.com/doc/reference/authentication
+    #
+    # Dicts are serialized as their keys in collated order, each followed by
+    # the serialization of its value. Lists are serialized as the
+    # concatenation of their serialized elements and None as nothing. All
+    # other values (including subclasses of dict and list, except for the
+    # dicts of request templates) are serialized using their text
+    # representation. The read-only views of trustly.data.data.view() are
+    # serialized as the dicts and lists they wrap.
+    #
+    # The pieces are collected in a list and joined once at the end, so the
+    # cost is linear in the size of the output.
+    #
+    # The payloads of the API reuse a small number of dict shapes (sets of
+    # keys), the collated key order is cached per shape so dicts of a known
+    # shape (for instance the rows of a GetViewStable result) are never
+    # sorted. The cache is cleared when the collation locale changes.
+class Serializer(object):
+        # Collation used to order the keys of dicts
+    collation = None
+        # trustly.api.cache.LRUCache mapping frozensets of keys to a _Shape
+        # with the collated key order
+    key_orders = None
+
+    def __init__(self, collation=None, key_order_cache_size=1024):
+        if collation is None:
+            collation = Collation()
+        self.collation = collation
+        self.key_orders = trustly.api.cache.LRUCache(maxsize=key_order_cache_size)
+
+        # Drop the cached key orders if the collation locale has changed
+        # since the last serialization
+    def _refresh(self):
+        if self.collation.refresh():
+            self.key_orders.clear()
+
+    def _shape(self, data):
+        key = frozenset(data)
+        shape = self.key_orders.get(key)
+        if shape is None:
+            shape = _Shape(self.collation.sorted_keys(data))
+            self.key_orders.put(key, shape)
+        return shape
+
+        # Return the hit/miss statistics of the key order cache as a
+        # trustly.api.cache.CacheInfo
+    def cache_info(self):
+        return self.key_orders.info()
+
+        # Walk data appending the serialized pieces to append. If flush is
+        # given it is called after each dict and list.
+    def _serialize(self, data, append, flush=None):
+        t = type(data)
+        if t is dict or t is _TemplatedDict or t is _MappingProxyType:
+            if data:
+                fragments = None
+                if t is _TemplatedDict:
+                    fragments = data.block.fragments(self)
+                for (k, text_key) in self._shape(data).text_keys:
+                    append(text_key)
+                    v = data[k]
+                    if type(v) is six.text_type:
+                        append(v)
+                    elif fragments is not None and k in fragments and fragments[k][0] is v:
+                        append(fragments[k][1])
+                    else:
+                        self._serialize(v, append, flush)
+                if flush is not None:
+                    flush()
+        elif t is list or t is _ListView:
+            for v in data:
+                self._serialize(v, append, flush)
+            if flush is not None:
+                flush()
+        elif t is six.text_type:
+            append(data)
+        elif data is not None:
+            append(six.text_type(data))
+
+        # Return the serialized form of data
+    def serialize(self, data):
+        self._refresh()
+        buf = []
+        self._serialize(data, buf.append)
+        return six.text_type('').join(buf)
+
+        # Return the plaintext for the signature of a call/response with the
+        # given method, uuid and data. None values for method and uuid are
+        # treated as empty strings.
+    def plaintext(self, method, uuid, data):
+        self._refresh()
+        buf = []
+        if method is not None:
+            buf.append(six.text_type(method))
+        if uuid is not None:
+            buf.append(six.text_type(uuid))
+        self._serialize(data, buf.append)
+        return six.text_type('').join(buf)
+
+        # Return the SHA1 hash object of the UTF-8 encoded plaintext(method,
+        # uuid, data), ready for signing or verification. The plaintext is
+        # never materialized, it is encoded and fed to the hash in chunks of
+        # about chunk_size pieces as it is produced.
+    def digest(self, method, uuid, data, chunk_size=DIGEST_CHUNK_SIZE):
+        self._refresh()
+        feed = _HashFeed(_SHA1Hash(), chunk_size)
+        if method is not None:
+            feed.append(six.text_type(method))
+        if uuid is not None:
+            feed.append(six.text_type(uuid))
+        self._serialize(data, feed.append, feed.check)
+        return feed.finish()
+
+        # Encode the trustly.data.jsonrpcrequest.JSONRPCRequest request for
+        # sending in a single walk of its data. Returns a PreparedRequest
+        # holding the SHA1 digest of the signature plaintext as well as the
+        # JSON body of the request, into which the signature is spliced once
+        # it has been computed. Keys of the data are written to the JSON body
+        # in collated order, any params.Signature of the request is ignored.
+    def prepare_request(self, request, chunk_size=DIGEST_CHUNK_SIZE):
+        payload = request.payload
+        params = payload.get('params')
+        if type(params) is not dict:
+            raise ValueError('Request has no params to sign')
+        method = payload.get('method')
+        uuid = params.get('UUID')
+
+        self._refresh()
+        feed = _HashFeed(_SHA1Hash(), chunk_size)
+        if method is not None:
+            feed.append(six.text_type(method))
+        if uuid is not None:
+            feed.append(six.text_type(uuid))
+
+        prefix = None
+        body = []
+        append = body.append
+        append('{')
+        for (k, v) in six.iteritems(payload):
+            if len(body) > 1:
+                append(',')
+            append(_json_dumps(k))
+            append(':')
+            if k != 'params':
+                append(_json_dumps(v))
+                continue
+
+            append('{')
+            for (pk, pv) in six.iteritems(v):
+                if pk == 'Signature':
+                    continue
+                append(_json_dumps(pk))
+                append(':')
+                if pk == 'Data':
+                    self._encode(pv, feed.append, append, feed.check)
+                else:
+                    append(_json_dumps(pv))
+                append(',')
+            append('"Signature":')
+            prefix = six.text_type('').join(body)
+            body = [None]
+            append = body.append
+            append('}')
+        append('}')
+
+        return PreparedRequest(feed.finish(), prefix, six.text_type('').join(body[1:]))
+
+        # Walk data once, appending the signature plaintext pieces to
+        # append_text and the JSON encoding to append_json
+    def _encode(self, data, append_text, append_json, flush):
+        t = type(data)
+        if t is dict or t is _TemplatedDict or t is _MappingProxyType:
+            if not data:
+                append_json('{}')
+                return
+
+            fragments = None
+            if t is _TemplatedDict:
+                fragments = data.block.fragments(self)
+
+            shape = self._shape(data)
+            if shape.json_keys is None:
+                    # Let json deal with the key conversions, serialize
+                    # separately
+                append_json(_json_dumps(data))
+                self._serialize(data, append_text, flush)
+                return
+
+            for (k, text_key, json_key) in shape.json_keys:
+                append_text(text_key)
+                append_json(json_key)
+                v = data[k]
+                if type(v) is six.text_type:
+                    append_text(v)
+                    append_json(_encode_string(v))
+                elif fragments is not None and k in fragments and fragments[k][0] is v:
+                    append_text(fragments[k][1])
+                    append_json(fragments[k][2])
+                else:
+                    self._encode(v, append_text, append_json, flush)
+            append_json('}')
+            flush()
+        elif t is list or t is _ListView:
+            if not data:
+                append_json('[]')
+                return
+
+            separator = '['
+            for v in data:
+                append_json(separator)
+                separator = ','
+                self._encode(v, append_text, append_json, flush)
+            append_json(']')
+            flush()
+        elif t is six.text_type:
+            append_text(data)
+            append_json(_encode_string(data))
+        else:
+            if data is not None:
+                append_text(six.text_type(data))
+            append_json(_json_dumps(data))
+
+    # Cached information about a set of dict keys
+class _Shape(object):
+    __slots__ = ('text_keys', 'json_keys')
+
+    def __init__(self, order):
+            # (key, text of key) in collated order
+        self.text_keys = tuple([(k, _text(k)) for k in order])
+
+            # (key, text of key, JSON encoded key with separators) in
+            # collated order, None if not all keys are strings and can be
+            # encoded as is.
+        self.json_keys = None
+        if all([type(k) in _json_key_types for k in order]):
+            json_keys = []
+            separator = '{'
+            for (k, text_key) in self.text_keys:
+                json_keys.append((k, text_key, separator + _encode_string(k) + ':'))
+                separator = ','
+            self.json_keys = tuple(json_keys)
+
+    # A request encoded by Serializer.prepare_request()
+class PreparedRequest(object):
+        # SHA1 hash object of the signature plaintext
+    digest = None
+
+    def __init__(self, digest, body_prefix, body_suffix):
+        self.digest = digest
+        self._body_prefix = body_prefix
+        self._body_suffix = body_suffix
+
+        # Return the UTF-8 encoded JSON body of the request with the given
+        # signature as params.Signature
+    def body(self, signature):
+        return (self._body_prefix + _json_dumps(signature) + self._body_suffix).encode('utf-8')
+
+def _text(k):
+    if type(k) is six.text_type:
+        return k
+    return six.text_type(k)
+
+    # Encode the read-only views of trustly.data.data.view() (which json
+    # does not know about) as the dict or list they wrap
+def _json_default(o):
+    if type(o) is _MappingProxyType:
+        return dict(o)
+    elif type(o) is _ListView:
+        return o._list
+    raise TypeError('Object of type {0} is not JSON serializable'.format(type(o).__name__))
+
+_json_dumps = json.JSONEncoder(separators=(',', ':'), default=_json_default).encode
+_encode_string = json.encoder.encode_basestring_ascii
+_json_key_types = (six.text_type, ) + ((str, ) if six.PY2 else ())
+_TemplatedDict = trustly.api.template.TemplatedDict
+_SHA1Hash = trustly.api.cryptobackend.SHA1Hash
+_MappingProxyType = trustly.data.data.MappingProxyType
+_ListView = trustly.data.data.ListView
+
+    # Buffer of plaintext pieces feeding a hash object. The pieces are
+    # appended to a plain list and check() (called by the serializer after
+    # every dict and list) feeds the hash once enough pieces are buffered.
+class _HashFeed(object):
+
+    def __init__(self, hasher, chunk_size):
+        self.hasher = hasher
+        self.chunk_size = chunk_size
+        self.buf = []
+        self.append = self.buf.append
+
+    def check(self):
+        if len(self.buf) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.buf:
+            self.hasher.update(six.text_type('').join(self.buf).encode('utf-8'))
+            del self.buf[:]
+
+    def finish(self):
+        self.flush()
+        return self.hasher
+
+_default_serializer = None
+
+    # Return the SHA1 hash object of the signature plaintext for method, uuid
+    # and data, see Serializer.digest(). Uses the given serializer or a module
+    # wide default one.
+def canonical_digest(method, uuid, data, serializer=None):
+    global _default_serializer
+
+    if serializer is None:
+        if _default_serializer is None:
+            _default_serializer = Serializer()
+        serializer = _default_serializer
+    return serializer.digest(method, uuid, data)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -23,37 +23,94 @@ THE SOFTWARE.
 """
 
 from __future__ import absolute_import
-import six.moves.http_client
-import uuid
+import functools
+import threading
 import base64
-from Crypto.Signature import PKCS1_v1_5
-from Crypto.Hash import SHA
-from Crypto.PublicKey import RSA
+import sys
 
 import trustly.api.api
+import trustly.api.cache
+import trustly.api.keycache
+import trustly.api.schema
+import trustly.api.serializer
+import trustly.api.template
+import trustly.api.unsigned
 import trustly.exceptions
 import trustly.data.jsonrpcrequest
 import trustly.data.jsonrpcsignedresponse
 import six
 
 class SignedAPI(trustly.api.api.API):
-        # Basic key management, the actual key and the imported class
-        # representation of the keys used in the integration. This is used for
-        # communications with the parts of the API requiring signing of data
-        # requests.
-    merchant_privatekey = None
-    merchant_signer = None
+        # Basic key management, trustly.api.keycache.LazyKey holding the key
+        # used in the integration. This is used for communications with the
+        # parts of the API requiring signing of data requests. The key is
+        # parsed when first used, see the merchant_privatekey and
+        # merchant_signer properties.
+    _merchant_key = None
 
     api_username = None
     api_password = None
 
-    def __init__(self, merchant_privatekey, username, password, host='trustly.com', port=443, is_https=True):
-
-        super(SignedAPI, self).__init__(host=host, port=port, is_https=is_https)
+        # Names of the methods issuing calls to the API, these are the methods
+        # that can be used with submit() and call_many()
+    api_methods = ('deposit', 'withdraw', 'refund', 'denywithdrawal',
+            'approvewithdrawal', 'selectaccount', 'registeraccount',
+            'accountpayout', 'p2p', 'capture', 'void', 'charge',
+            'get_withdrawals', 'hello')
+
+        # Thread pool used by submit() and call_many(). It is created on first
+        # use and is sized after the connection pool of the default transport
+        # unless max_workers is given to the constructor.
+    executor = None
+    executor_max_workers = None
+
+        # trustly.api.cache.LRUCache mapping SHA1 digests of signature
+        # plaintexts to their signatures. PKCS#1 v1.5 signatures are
+        # deterministic, so a retried request with unchanged content does not
+        # need another private key operation. None if disabled.
+    signature_cache = None
+
+        # trustly.api.schema.MethodSchema objects describing the requests of
+        # the API methods, per API method name
+    method_schemas = trustly.api.schema.SIGNED_METHODS
+
+        # trustly.api.template.Template objects per API method name (as in
+        # the request, e.g. 'Deposit'), see set_template()
+    templates = None
+
+        # trustly.api.signingpool.SigningPool used by call_many() and
+        # sign_many() to sign in worker processes, see use_signing_pool().
+        # call_many() signs signing_batch_size requests at a time.
+    signing_pool = None
+    signing_batch_size = 256
+        # The signing pool created by use_signing_pool(), which is stopped by
+        # shutdown()
+    _own_signing_pool = None
+
+        # Unsigned API used for the unsigned calls (hello()), created on first
+        # use, see unsigned_api()
+    _unsigned_api = None
+
+    def __init__(self, merchant_privatekey, username, password, host='trustly.com', port=443, is_https=True, connection_pool=None, transport=None,
+            max_workers=None, signature_cache_size=1024):
+
+        super(SignedAPI, self).__init__(host=host, port=port, is_https=is_https,
+                connection_pool=connection_pool, transport=transport)
 
         self.api_username = username
         self.api_password = password
 
+        if max_workers is None:
+            max_workers = 10
+            if self.connection_pool is not None and self.connection_pool.maxsize is not None:
+                max_workers = self.connection_pool.maxsize
+        self.executor_max_workers = max_workers
+        self._executor_lock = threading.Lock()
+        self.templates = {}
+
+        if signature_cache_size:
+            self.signature_cache = trustly.api.cache.LRUCache(maxsize=signature_cache_size)
+
         if isinstance(merchant_privatekey, six.string_types):
             merchant_privatekey = merchant_privatekey.encode()
 
@@ -69,14 +126,99 @@ class SignedAPI(trustly.api.api.API):
         pkeyfile.close()
         self.use_merchant_privatekey(cert)
 
+        # Use the PEM encoded private key cert (or a LazyKey) for signing.
+        # The key is parsed (and any errors in it raised) when first used.
     def use_merchant_privatekey(self, cert):
-        self.merchant_privatekey = RSA.importKey(cert)
-        self.merchant_signer = PKCS1_v1_5.new(self.merchant_privatekey)
+        if not isinstance(cert, trustly.api.keycache.LazyKey):
+            cert = trustly.api.keycache.LazyKey(pem=cert, private=True)
+        self._merchant_key = cert
+        if self.signature_cache is not None:
+            self.signature_cache.clear()
+        if self.signing_pool is not None:
+            self.use_signing_pool(self.signing_pool.processes)
+
+        # Sign batches in processes worker processes (one per core if None)
+        # loading the merchant private key once each, see
+        # trustly.api.signingpool. The workers are started right away. A
+        # processes of 0 stops using a pool. The pool is returned, it can be
+        # shared with other instances using the same key by setting their
+        # signing_pool. Only the instance that created a pool stops it.
+    def use_signing_pool(self, processes=None):
+        import trustly.api.signingpool
+
+        self._close_signing_pool()
+        self.signing_pool = None
+
+        if processes != 0:
+            if self._merchant_key is None:
+                raise trustly.exceptions.TrustlySignatureError('No private key has been loaded for signing')
+            self.signing_pool = trustly.api.signingpool.SigningPool(self._merchant_key,
+                    processes=processes, backend=self.get_crypto_backend()).start()
+            self._own_signing_pool = self.signing_pool
+        return self.signing_pool
+
+        # Sign the SHA1 hash objects of several signature plaintexts, returns
+        # a list of the base64 encoded signatures. Uses the signing pool if
+        # set, signatures are looked up in and added to the signature cache.
+    def sign_many(self, digests):
+        if self._merchant_key is None:
+            raise trustly.exceptions.TrustlySignatureError('No private key has been loaded for signing')
+
+        pool = self.signing_pool
+        cache = self.signature_cache
+        if pool is None:
+            return [self.sign_merchant_digest(d) for d in digests]
+
+        keys = [d.digest() for d in digests]
+        signatures = [None] * len(keys)
+        missing = []
+        for (i, key) in enumerate(keys):
+            if cache is not None:
+                signatures[i] = cache.get(key)
+            if signatures[i] is None:
+                missing.append(i)
+
+        for (i, signature) in zip(missing, pool.sign_many([keys[i] for i in missing])):
+            signatures[i] = signature
+            if cache is not None:
+                cache.put(keys[i], signature)
+        return signatures
+
+        # The imported RSA private key of the merchant
+    @property
+    def merchant_privatekey(self):
+        if self._merchant_key is None:
+            return None
+        return self._merchant_key.key
+
+        # PKCS#1 v1.5 signer for merchant_privatekey
+    @property
+    def merchant_signer(self):
+        if self._merchant_key is None:
+            return None
+        return self._merchant_key.scheme
+
+    def _snapshot_keys(self):
+        keys = super(SignedAPI, self)._snapshot_keys()
+        if self._merchant_key is not None:
+            keys['merchant'] = self._merchant_key
+        return keys
+
+    def use_key_snapshot(self, snapshot):
+        snapshot = super(SignedAPI, self).use_key_snapshot(snapshot)
+        key = snapshot.get('merchant')
+        if key is not None:
+            self.use_merchant_privatekey(key)
+        return snapshot
 
     def sign_merchant_request(self, data):
-        if self.merchant_signer is None:
+        if self._merchant_key is None:
             raise trustly.exceptions.TrustlySignatureError('No private key has been loaded for signing')
 
+        sha1hash = data.cached(('digest', self.serializer), lambda: self._request_digest(data))
+        return self.sign_merchant_digest(sha1hash)
+
+    def _request_digest(self, data):
         method = data.get_method()
         if method is None:
             method = ''
@@ -89,21 +231,108 @@ class SignedAPI(trustly.api.api.API):
         if data is None:
             data = {}
 
-        plaintext = six.text_type(method + uuid + self.serialize_data(data))
-        sha1hash = SHA.new(plaintext.encode('utf-8'))
-        signature = self.merchant_signer.sign(sha1hash)
+        return trustly.api.serializer.canonical_digest(method, uuid, data, serializer=self.serializer)
+
+        # Sign the SHA1 hash object of a signature plaintext with the merchant
+        # private key, returns the base64 encoded signature. Signatures are
+        # looked up in and added to the signature cache.
+    def sign_merchant_digest(self, sha1hash):
+        if self._merchant_key is None:
+            raise trustly.exceptions.TrustlySignatureError('No private key has been loaded for signing')
+
+        cache = self.signature_cache
+        if cache is not None:
+            key = sha1hash.digest()
+            signature = cache.get(key)
+            if signature is not None:
+                return signature
+
+        backend = self.get_crypto_backend()
+        signature = backend.sign_sha1_pkcs1v15(self._merchant_key.handle(backend), sha1hash.digest())
         if six.PY2:
-            return base64.b64encode(signature)
+            signature = base64.b64encode(signature)
         else:
-            return base64.b64encode(signature).decode()
+            signature = base64.b64encode(signature).decode()
+
+        if cache is not None:
+            cache.put(key, signature)
+        return signature
+
+        # Return the hit/miss statistics of the signature cache as a
+        # trustly.api.cache.CacheInfo, None if the cache is disabled
+    def signature_cache_info(self):
+        if self.signature_cache is None:
+            return None
+        return self.signature_cache.info()
+
+        # Declare data and attributes fields to merge into every request for
+        # the API method (for instance 'Deposit'). Fields passed to the call
+        # take precedence over the template. The template is frozen: it is
+        # vacuumed and serialized once, later changes to the data or
+        # attributes passed here have no effect. Calling without data and
+        # attributes removes the template of the method.
+    def set_template(self, method, data=None, attributes=None):
+        if data is None and attributes is None:
+            self.templates.pop(method, None)
+            return None
+
+        template = trustly.api.template.Template(data=data, attributes=attributes)
+        self.templates[method] = template
+        return template
+
+    def apply_template(self, request):
+        template = self.templates.get(request.get_method())
+        if template is not None:
+            template.apply(request)
 
     def insert_credentials(self, request):
+        self._insert_login(request)
+        request.set_param('Signature', self.sign_merchant_request(request))
+
+        # Insert the credentials, then compute the signature plaintext digest
+        # and the JSON body in a single pass over the request data and splice
+        # the signature into the body. The signed body is cached in the
+        # request, sending it again unmodified will not redo any of this.
+    def prepare_request(self, request):
+        self._insert_login(request)
+
+        def sign():
+            prepared = self.serializer.prepare_request(request)
+            signature = self.sign_merchant_digest(prepared.digest)
+            request.set_param('Signature', signature)
+            return prepared.body(signature)
+
+        return request.cached(('body', self.serializer, self._merchant_key), sign)
+
+        # Apply the template and set the login credentials in the request
+        # data, shared by insert_credentials() and the prepare methods
+    def _insert_login(self, request):
+        self.apply_template(request)
         request.set_data('Username', self.api_username)
         request.set_data('Password', self.api_password)
-        request.set_param('Signature', self.sign_merchant_request(request))
+
+        # prepare_request() for a batch of requests, with the signatures made
+        # by sign_many()
+    def prepare_many(self, requests):
+        import uuid
+        prepared = []
+        for request in requests:
+            if request.get_uuid() is None:
+                request.set_uuid(str(uuid.uuid1()))
+            self._insert_login(request)
+            prepared.append(self.serializer.prepare_request(request))
+
+        signatures = self.sign_many([p.digest for p in prepared])
+        ret = []
+        for (request, p, signature) in zip(requests, prepared, signatures):
+            request.set_param('Signature', signature)
+            ret.append(request.cached(('body', self.serializer, self._merchant_key),
+                lambda p=p, signature=signature: p.body(signature)))
+        return ret
 
     def handle_response(self, request, httpcall):
-        response = trustly.data.jsonrpcsignedresponse.JSONRPCSignedResponse(httpcall)
+        response = trustly.data.jsonrpcsignedresponse.JSONRPCSignedResponse(httpcall,
+                lazy=self.lazy_responses, retain_body=self.retain_response_body)
 
         if not self.verify_trustly_signed_response(response):
             raise trustly.exceptions.TrustlySignatureError('Incoming message signature is not valid', response)
@@ -125,10 +354,169 @@ class SignedAPI(trustly.api.api.API):
 
     def call(self, request):
         if request.get_uuid() is None:
+                # uuid is slow to import, wait until it is needed
+            import uuid
             request.set_uuid(str(uuid.uuid1()))
 
         return super(SignedAPI, self).call(request)
 
+    def _get_executor(self):
+        import concurrent.futures
+        with self._executor_lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.executor_max_workers)
+            return self.executor
+
+    def _api_method(self, method_name):
+        if method_name not in self.api_methods:
+            raise ValueError('{0} is not an API method'.format(method_name))
+        return getattr(self, method_name)
+
+        # Issue the call method_name(**kwargs) (for instance
+        # submit('refund', orderid=..., amount=..., currency=...)) in the
+        # background. Returns a concurrent.futures.Future resolving to the
+        # response of the call.
+    def submit(self, method_name, **kwargs):
+        method = self._api_method(method_name)
+        return self._get_executor().submit(method, **kwargs)
+
+        # Issue a batch of calls in the background. requests is an iterable
+        # of (method_name, kwargs) tuples, at most max_workers of them will be
+        # in flight at any time. Yields (index, future) tuples as the calls
+        # complete, where index is the position of the call in requests and
+        # future is a completed concurrent.futures.Future holding the response
+        # or the exception raised by the call.
+    def call_many(self, requests, max_workers=None):
+        import concurrent.futures
+        if max_workers is None:
+            max_workers = self.executor_max_workers
+
+        executor = self._get_executor()
+        if self.signing_pool is None:
+            calls = (self._method_call(method_name, kwargs) for (method_name, kwargs) in requests)
+        else:
+            calls = self._presigned_calls(requests)
+        calls = enumerate(calls)
+        pending = {}
+
+        def fill():
+            while len(pending) < max_workers:
+                try:
+                    (index, call) = next(calls)
+                except StopIteration:
+                    return
+                pending[executor.submit(call)] = index
+
+        fill()
+        while pending:
+            (done, not_done) = concurrent.futures.wait(list(pending), return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                yield (index, future)
+            fill()
+
+        # Return a callable issuing the call method_name(**kwargs). If
+        # method_name is not an API method the callable raises the error, so
+        # it ends up in the future of the call rather than in call_many().
+    def _method_call(self, method_name, kwargs):
+        try:
+            method = self._api_method(method_name)
+        except Exception:
+            return functools.partial(six.reraise, *sys.exc_info())
+        return functools.partial(method, **kwargs)
+
+        # Turn (method_name, kwargs) tuples into callables issuing the calls,
+        # building and signing the requests of the signed API methods in
+        # batches with prepare_many() as they are consumed. Errors building a
+        # request or signing a batch are raised by the calls concerned.
+    def _presigned_calls(self, requests):
+        requests = iter(requests)
+        while True:
+            batch = []
+            calls = []
+            for (method_name, kwargs) in requests:
+                schema = None
+                if method_name in self.api_methods:
+                    schema = self._api_method_schema(method_name)
+                request = None
+                if schema is not None:
+                    try:
+                        schema.check(kwargs)
+                        request = schema.build(kwargs)
+                    except TypeError:
+                            # Let the call raise it
+                        pass
+
+                if request is None:
+                    calls.append(self._method_call(method_name, kwargs))
+                else:
+                    batch.append((len(calls), request))
+                    calls.append(functools.partial(self.call, request))
+                if len(calls) >= self.signing_batch_size:
+                    break
+
+            if not calls:
+                return
+            if batch:
+                try:
+                    self.prepare_many([request for (i, request) in batch])
+                except Exception:
+                    failed = functools.partial(six.reraise, *sys.exc_info())
+                    for (i, request) in batch:
+                        calls[i] = failed
+            for call in calls:
+                yield call
+
+        # Return the MethodSchema of the request issued by the API method
+        # method_name (e.g. 'get_withdrawals'), None for unsigned methods
+    def _api_method_schema(self, method_name):
+        name = method_name.replace('_', '').lower()
+        for (method, schema) in six.iteritems(self.method_schemas):
+            if method.lower() == name:
+                return schema
+        return None
+
+        # Stop the background thread pool used by submit() and call_many() and
+        # the signing pool, and release the connections held by the
+        # transport.
+    def shutdown(self, wait=True):
+        with self._executor_lock:
+            executor = self.executor
+            self.executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        self._close_signing_pool()
+        self.transport.close()
+
+        # Stop the signing pool if it was created by this instance, a pool
+        # shared from another instance is left to its owner
+    def _close_signing_pool(self):
+        pool = self._own_signing_pool
+        self._own_signing_pool = None
+        if pool is not None:
+            pool.close()
+
+    def _method_schema(self, method):
+        schema = self.method_schemas.get(method)
+        if schema is None:
+            raise ValueError('{0} is not an API method'.format(method))
+        return schema
+
+        # Build the request for the API method (for instance 'Deposit') from
+        # the mapping values of lower case field names to values
+    def build_request(self, method, values):
+        return self._method_schema(method).build(values)
+
+        # Issue a call to any API method described in method_schemas, the
+        # keyword arguments are the lower case names of the Data and
+        # Attributes fields (call_method('Refund', orderid=..., amount=...,
+        # currency=...))
+    def call_method(self, method, **kwargs):
+        schema = self._method_schema(method)
+        schema.check(kwargs)
+        return self.call(schema.build(kwargs))
+
     def deposit(self, notificationurl, enduserid, messageid,
             locale=None, amount=None, currency=None, country=None, ip=None,
             successurl=None, failurl=None, templateurl=None, urltarget=None,
@@ -140,48 +528,7 @@ class SignedAPI(trustly.api.api.API):
             shippingaddresspostalcode=None, shippingaddresscity=None,
             shippingaddressline1=None, shippingaddressline2=None,
             shippingaddress=None, unchangeablenationalidentificationnumber=None):
-
-        attributes = dict(
-                Locale=locale,
-                Amount=amount,
-                Currency=currency,
-                Country=country,
-                IP=ip,
-                SuccessURL=successurl,
-                FailURL=failurl,
-                TemplateURL=templateurl,
-                URLTarget=urltarget,
-                MobilePhone=mobilephone,
-                Firstname=firstname,
-                Lastname=lastname,
-                NationalIdentificationNumber=nationalidentificationnumber,
-                ShopperStatement=shopperstatement,
-                SuggestedMinAmount=suggestedminamount,
-                SuggestedMaxAmount=suggestedmaxamount,
-                IntegrationModule=integrationmodule,
-                Email=email,
-                ShippingAddressCountry=shippingaddresscountry,
-                ShippingAddressPostalcode=shippingaddresspostalcode,
-                ShippingAddressCity=shippingaddresscity,
-                ShippingAddressLine1=shippingaddressline1,
-                ShippingAddressLine2=shippingaddressline2,
-                ShippingAddress=shippingaddress
-                )
-
-        if holdnotifications:
-            attributes['HoldNotifications'] = 1
-        if unchangeablenationalidentificationnumber:
-            attributes['UnchangeableNationalIdentificationNumber'] = 1
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='Deposit',
-                data=dict(
-                    NotificationURL=notificationurl,
-                    EndUserID=enduserid,
-                    MessageID=messageid
-                    ),
-                attributes=attributes
-                )
-        return self.call(data)
+        return self.call(self.build_request('Deposit', locals()))
 
     def withdraw(self, notificationurl,
             enduserid, messageid, currency,
@@ -193,75 +540,16 @@ class SignedAPI(trustly.api.api.API):
             addresscountry=None,
             addresspostalcode=None, addresscity=None,
             addressline1=None, addressline2=None):
-
-        attributes = dict(
-                Locale=locale,
-                Country=country,
-                IP=ip,
-                TemplateURL=templateurl,
-                ClearingHouse=clearinghouse,
-                BankNumber=banknumber,
-                AccountNumber=accountnumber,
-                Firstname=firstname,
-                Lastname=lastname,
-                MobilePhone=mobilephone,
-                NationalIdentificationNumber=nationalidentificationnumber,
-                Email=email,
-                DateOfBirth=dateofbirth,
-                AddressCountry=addresscountry,
-                AddressPostalcode=addresspostalcode,
-                AddressCity=addresscity,
-                AddressLine1=addressline1,
-                AddressLine2=addressline2,
-                Address=address
-                )
-
-        if holdnotifications:
-            attributes['HoldNotifications'] = 1
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='Withdraw',
-                data=dict(
-                    NotificationURL=notificationurl,
-                    EndUserID=enduserid,
-                    MessageID=messageid,
-                    Currency=currency,
-                    Amount=None
-                    ),
-                attributes=attributes
-                )
-        return self.call(data)
+        return self.call(self.build_request('Withdraw', locals()))
 
     def refund(self, orderid, amount, currency):
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='Refund',
-                data=dict(
-                    OrderID=orderid,
-                    Amount=amount,
-                    Currency=currency
-                    )
-                )
-
-        return self.call(data)
+        return self.call(self.build_request('Refund', locals()))
 
     def denywithdrawal(self, orderid):
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='DenyWithdrawal',
-                data=dict(
-                    OrderID=orderid
-                    )
-                )
-
-        return self.call(data)
+        return self.call(self.build_request('DenyWithdrawal', locals()))
 
     def approvewithdrawal(self, orderid):
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='ApproveWithdrawal',
-                data=dict(
-                    OrderID=orderid
-                    )
-                )
-
-        return self.call(data)
+        return self.call(self.build_request('ApproveWithdrawal', locals()))
 
     def selectaccount(self, notificationurl, enduserid, messageid,
             locale=None, country=None, ip=None, successurl=None,
@@ -269,36 +557,7 @@ class SignedAPI(trustly.api.api.API):
             mobilephone=None, firstname=None, lastname=None,
             holdnotifications=None, email=None, dateofbirth=None,
             requestdirectdebitmandate=None):
-
-        attributes = dict(
-                Locale=locale,
-                Country=country,
-                IP=ip,
-                SuccessURL=successurl,
-                FailURL=failurl,
-                TemplateURL=templateurl,
-                URLTarget=urltarget,
-                MobilePhone=mobilephone,
-                Firstname=firstname,
-                Lastname=lastname,
-                Email=email,
-                DateOfBirth=dateofbirth
-                )
-
-        if holdnotifications:
-            attributes['HoldNotifications'] = 1
-        if requestdirectdebitmandate:
-            attributes['RequestDirectDebitMandate'] = 1
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='SelectAccount',
-                data=dict(
-                    NotificationURL=notificationurl,
-                    EndUserID=enduserid,
-                    MessageID=messageid
-                    ),
-                attributes=attributes
-                )
-        return self.call(data)
+        return self.call(self.build_request('SelectAccount', locals()))
 
     def registeraccount(self, enduserid, clearinghouse, banknumber,
             accountnumber, firstname, lastname, mobilephone=None,
@@ -307,52 +566,11 @@ class SignedAPI(trustly.api.api.API):
             addresscountry=None,
             addresspostalcode=None, addresscity=None,
             addressline1=None, addressline2=None):
-
-        attributes = dict(
-                MobilePhone=mobilephone,
-                NationalIdentificationNumber=nationalidentificationnumber,
-                Email=email,
-                DateOfBirth=dateofbirth,
-                AddressCountry=addresscountry,
-                AddressPostalcode=addresspostalcode,
-                AddressCity=addresscity,
-                AddressLine1=addressline1,
-                AddressLine2=addressline2,
-                Address=address
-                )
-
-        if holdnotifications:
-            attributes['HoldNotifications'] = 1
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='RegisterAccount',
-                data=dict(
-                    EndUserID=enduserid,
-                    ClearingHouse=clearinghouse,
-                    BankNumber=banknumber,
-                    AccountNumber=accountnumber,
-                    Firstname=firstname,
-                    Lastname=lastname
-                    ),
-                attributes=attributes
-                )
-        return self.call(data)
+        return self.call(self.build_request('RegisterAccount', locals()))
 
     def accountpayout(self, notificationurl, accountid, enduserid, messageid,
             amount, currency):
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='AccountPayout',
-                data=dict(
-                    NotificationURL=notificationurl,
-                    AccountID=accountid,
-                    EndUserID=enduserid,
-                    MessageID=messageid,
-                    Amount=amount,
-                    Currency=currency
-                    ),
-                attributes=dict(
-                    )
-                )
-        return self.call(data)
+        return self.call(self.build_request('AccountPayout', locals()))
 
     def p2p(self, notificationurl, enduserid, messageid,
             locale=None, amount=None, currency=None, country=None, ip=None,
@@ -362,105 +580,44 @@ class SignedAPI(trustly.api.api.API):
             suggestedminamount=None, suggestedmaxamount=None,
             integrationmodule=None, holdnotifications=None,
             authorizeonly=None, templatedata=None):
-
-        attributes = dict(
-                AuthorizeOnly=self.api_bool(authorizeonly),
-                TemplateData=templatedata,
-                Locale=locale,
-                Amount=amount,
-                Currency=currency,
-                Country=country,
-                IP=ip,
-                SuccessURL=successurl,
-                FailURL=failurl,
-                TemplateURL=templateurl,
-                URLTarget=urltarget,
-                MobilePhone=mobilephone,
-                Firstname=firstname,
-                Lastname=lastname,
-                NationalIdentificationNumber=nationalidentificationnumber,
-                ShopperStatement=shopperstatement,
-                SuggestedMinAmount=suggestedminamount,
-                SuggestedMaxAmount=suggestedmaxamount,
-                IntegrationModule=integrationmodule
-                )
-
-        if holdnotifications:
-            attributes['HoldNotifications'] = 1
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='P2P',
-                data=dict(
-                    NotificationURL=notificationurl,
-                    EndUserID=enduserid,
-                    MessageID=messageid
-                    ),
-                attributes=attributes
-                )
-        return self.call(data)
+        return self.call(self.build_request('P2P', locals()))
 
     def capture(self, orderid, amount, currency):
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='Capture',
-                data=dict(
-                    OrderID=orderid,
-                    Amount=amount,
-                    Currency=currency
-                    ),
-
-                attributes=dict(
-                    )
-                )
-        return self.call(data)
+        return self.call(self.build_request('Capture', locals()))
 
     def void(self, orderid):
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='Void',
-                data=dict(
-                    OrderID=orderid
-                    ),
-
-                attributes=dict(
-                    )
-                )
-        return self.call(data)
+        return self.call(self.build_request('Void', locals()))
 
     def charge(self, accountid, notificationurl, enduserid, messageid,
             amount, currency, shopperstatement=None):
-
-        attributes = dict(
-                ShopperStatement=shopperstatement
-                )
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='Charge',
-                data=dict(
-                    AccountID=accountid,
-                    NotificationURL=notificationurl,
-                    EndUserID=enduserid,
-                    MessageID=messageid,
-                    Amount=amount,
-                    Currency=currency
-                    ),
-                attributes=attributes
-                )
-        return self.call(data)
+        return self.call(self.build_request('Charge', locals()))
 
     def get_withdrawals(self, orderid):
-
-        data = trustly.data.jsonrpcrequest.JSONRPCRequest(method='GetWithdrawals',
-                data=dict(
-                    OrderID=orderid
-                    ),
-
-                attributes=dict(
-                    )
-                )
-        return self.call(data)
+        return self.call(self.build_request('GetWithdrawals', locals()))
+
+        # Return an unsigned API using our credentials, endpoint, transport and
+        # trustly public key. It is created on first use and reused as long
+        # as these stay the same.
+    def unsigned_api(self):
+        api = self._unsigned_api
+        if api is None or api.api_username != self.api_username or api.api_password != self.api_password or \
+                api.api_host != self.api_host or api.api_port != self.api_port or \
+                api.api_is_https != self.api_is_https or api.transport is not self.transport or \
+                api._trustly_key is not self._trustly_key:
+            api = self._new_unsigned_api()
+            api.serializer = self.serializer
+            self._unsigned_api = api
+        api.lazy_responses = self.lazy_responses
+        api.retain_response_body = self.retain_response_body
+        return api
+
+    def _new_unsigned_api(self):
+        return trustly.api.unsigned.UnsignedAPI(username=self.api_username, password=self.api_password,
+                host=self.api_host, port=self.api_port, is_https=self.api_is_https,
+                transport=self.transport, trustly_publickey=self._trustly_key)
 
     def hello(self):
-            # The hello call is not signed, use an unsigned API to do the request and then void it
-        api = trustly.api.unsigned.UnsignedAPI(username=self.api_username, password=self.api_password,
-                host=self.api_host, port=self.api_port, is_https=self.api_is_https)
-
-        return api.hello()
+            # The hello call is not signed, use the unsigned API to do the request
+        return self.unsigned_api().hello()
 
 # vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,145 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Process pool for RSA signing. The private key operations hold the GIL, so
+# signing from several threads does not use more than one core. A
+# SigningPool spreads the signatures of a batch over worker processes, see
+# SignedAPI.use_signing_pool().
+
+from __future__ import absolute_import
+import base64
+import multiprocessing
+import os
+import pickle
+import threading
+
+import six
+
+import trustly.api.cryptobackend
+import trustly.api.keycache
+
+    # Workers are started with spawn where available. The pool may be
+    # started while other threads (e.g. the executor of call_many()) hold
+    # locks, which a forked child would inherit locked.
+_context = multiprocessing
+if hasattr(multiprocessing, 'get_context'):
+    _context = multiprocessing.get_context('spawn')
+
+    # (backend, native key) of the worker process, set up by _init_worker()
+_worker = None
+
+    # Load the key in a worker process. The key is handed to every worker
+    # once as its integer components, never with the tasks. The backend is
+    # handed over as its class, the registry of the worker only holds the
+    # built in backends.
+def _init_worker(components, backend_class):
+    global _worker
+    backend = backend_class()
+    _worker = (backend, backend.construct(components))
+
+def _sign(digest):
+    (backend, key) = _worker
+    signature = base64.b64encode(backend.sign_sha1_pkcs1v15(key, digest))
+    if not six.PY2:
+        signature = signature.decode()
+    return signature
+
+class SigningPool(object):
+        # Number of worker processes
+    processes = None
+        # Number of digests handed to a worker at a time by sign_many()
+    chunksize = None
+
+        # merchant_privatekey is a trustly.api.keycache.LazyKey or the PEM
+        # encoded private key. The workers use the given
+        # trustly.api.cryptobackend backend (or backend name), the default
+        # backend if None. The class of the backend must be importable by
+        # the workers, ValueError is raised otherwise. The processes are
+        # started on first use or by start().
+    def __init__(self, merchant_privatekey, processes=None, backend=None, chunksize=16):
+        if not isinstance(merchant_privatekey, trustly.api.keycache.LazyKey):
+            merchant_privatekey = trustly.api.keycache.LazyKey(pem=merchant_privatekey, private=True)
+        if backend is None or isinstance(backend, six.string_types):
+            backend = trustly.api.cryptobackend.get_backend(backend)
+        try:
+            pickle.dumps(type(backend))
+        except Exception as e:
+            raise ValueError('Backend {0} cannot be used in worker processes: {1}'.format(backend.name, e))
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        self.processes = processes
+        self.chunksize = chunksize
+        self._components = tuple(merchant_privatekey.get_components())
+        self._backend_class = type(backend)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _get_pool(self):
+        with self._lock:
+                # A pool inherited through fork belongs to the parent, leave
+                # it alone and start our own workers
+            if self._pool is not None and self._pid != os.getpid():
+                self._pool = None
+            if self._pool is None:
+                self._pool = _context.Pool(self.processes, _init_worker,
+                        (self._components, self._backend_class))
+                self._pid = os.getpid()
+            return self._pool
+
+        # Start the worker processes now rather than on first use
+    def start(self):
+        self._get_pool()
+        return self
+
+        # Sign the SHA1 digests (bytes or hash objects) and return a list of
+        # the base64 encoded signatures in the same order
+    def sign_many(self, digests):
+        digests = [d if isinstance(d, bytes) else d.digest() for d in digests]
+        if not digests:
+            return []
+        return self._get_pool().map(_sign, digests, self.chunksize)
+
+        # Sign a single digest, see sign_many()
+    def sign(self, digest):
+        return self.sign_many([digest])[0]
+
+        # Stop the worker processes, they are started again if the pool is
+        # used after this
+    def close(self):
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None and self._pid == os.getpid():
+            pool.close()
+            pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,115 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Immutable request templates. A template declares Data and Attributes
+# fields shared by many requests for an API method (locale, URLs, shopper
+# statement etc). The fields are vacuumed once when the template is created
+# and their serializations (signature plaintext and JSON) are computed once
+# per Serializer, after that they are spliced into the output for every
+# request using the template instead of being walked again.
+
+from __future__ import absolute_import
+import copy
+import json
+import threading
+
+import six
+
+import trustly.data.vacuum
+
+_json_dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+    # A frozen set of fields, with the serializations of their values
+class TemplateBlock(object):
+        # The vacuumed fields of the block. Shared between all requests using
+        # the template and must not be modified.
+    values = None
+
+    def __init__(self, values):
+        values = trustly.data.vacuum.vacuum(copy.deepcopy(values), inplace=True)
+        if values is None:
+            values = {}
+        self.values = values
+
+        self._fragments = {}
+        self._lock = threading.Lock()
+
+        # Return a dict mapping the keys of the block to (value, plaintext,
+        # json) tuples of their serialized values, as computed by serializer
+        # in its current collation locale.
+    def fragments(self, serializer):
+        key = (serializer, serializer.collation.locale_name)
+        fragments = self._fragments.get(key)
+        if fragments is None:
+            fragments = {}
+            for (k, v) in six.iteritems(self.values):
+                fragments[k] = (v, serializer.serialize(v), _json_dumps(v))
+            with self._lock:
+                self._fragments[key] = fragments
+        return fragments
+
+    # dict of request fields merged from a TemplateBlock and the fields of the
+    # request. Values still identical to the ones of the block are serialized
+    # from the precomputed fragments.
+class TemplatedDict(dict):
+    block = None
+
+    def __init__(self, block, values=None):
+        super(TemplatedDict, self).__init__(block.values)
+        self.block = block
+        if values:
+            self.update(values)
+
+    # Data and Attributes fields to merge into all requests for an API method.
+    # Fields given in the request take precedence over the template.
+class Template(object):
+    data = None
+    attributes = None
+
+    def __init__(self, data=None, attributes=None):
+        self.data = TemplateBlock(data or {})
+        self.attributes = TemplateBlock(attributes or {})
+
+        # Merge the template into the Data (and Data.Attributes) of the
+        # trustly.data.jsonrpcrequest.JSONRPCRequest request. Requests the
+        # template has already been applied to are left as they are.
+    def apply(self, request):
+        params = request.payload['params']
+        data = params.get('Data')
+        if data is None:
+            data = {}
+        elif type(data) is TemplatedDict and data.block is self.data:
+            return
+        elif type(data) is not dict:
+            return
+
+        merged = TemplatedDict(self.data, data)
+        if self.attributes.values:
+            attributes = data.get('Attributes')
+            if attributes is None or type(attributes) is dict:
+                merged['Attributes'] = TemplatedDict(self.attributes, attributes)
+
+        request.set_param('Data', merged)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
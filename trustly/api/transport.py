@@ -0,0 +1,211 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+from __future__ import absolute_import
+import collections
+
+import six
+
+import trustly.api.connectionpool
+import trustly.exceptions
+
+    # The result of a completed HTTP call. Mimics the parts of the httplib
+    # connection/response interface that trustly.data.response.Response uses
+    # so responses read by a transport can be handed to the response data
+    # classes.
+class HTTPResult(object):
+    status = None
+    reason = None
+    headers = None
+    body = None
+
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def getresponse(self):
+        return self
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def read(self):
+        return self.body
+
+    # Base class for the transports used by trustly.api.api.API to talk HTTP
+    # with the API backend. A transport is bound to an endpoint with
+    # set_endpoint() and only needs to implement send().
+class Transport(object):
+        # Connection information for the API backend
+    api_host = None
+    api_port = None
+    api_is_https = None
+
+    def __init__(self, host=None, port=None, is_https=True):
+        self.set_endpoint(host, port, is_https)
+
+    def set_endpoint(self, host, port, is_https=True):
+        self.api_host = host
+        self.api_port = port
+        self.api_is_https = bool(is_https)
+
+        # POST body (bytes) to url_path on the endpoint and return a tuple of
+        # (status, reason, headers, body) where headers is a dict with lower
+        # case header names and body is the raw response body. timeout is the
+        # socket timeout in seconds, None for the transport default. Should
+        # raise TrustlyConnectionError if the call failed.
+    def send(self, url_path, body, headers, timeout=None):
+        raise NotImplementedError()
+
+        # Release any resources (connections) held by the transport
+    def close(self):
+        pass
+
+    # Transport using httplib with keep-alive connections from a
+    # trustly.api.connectionpool.ConnectionPool
+class HTTPClientTransport(Transport):
+    connection_pool = None
+
+    def __init__(self, host=None, port=None, is_https=True, connection_pool=None):
+        super(HTTPClientTransport, self).__init__(host=host, port=port, is_https=is_https)
+
+        if connection_pool is None:
+            connection_pool = trustly.api.connectionpool.ConnectionPool()
+        self.connection_pool = connection_pool
+
+    def send(self, url_path, body, headers, timeout=None):
+        call = self.connection_pool.checkout(self.api_host, self.api_port, self.api_is_https)
+            # Only hand the connection back for reuse if we know the full
+            # response has been read from it
+        reuse = False
+            # The timeout applies to this call only, the connection goes back
+            # to the pool with the timeout it was created with
+        default_timeout = call.timeout
+        try:
+            if timeout is not None:
+                call.timeout = timeout
+                if call.sock is not None:
+                    call.sock.settimeout(timeout)
+
+            call.request('POST', url_path, body, headers)
+            resp = call.getresponse()
+            response_body = resp.read()
+            response_headers = dict([(name.lower(), value) for (name, value) in resp.getheaders()])
+            reuse = True
+        except Exception as e:
+            raise trustly.exceptions.TrustlyConnectionError(str(e))
+        finally:
+            if timeout is not None:
+                call.timeout = default_timeout
+                if call.sock is not None:
+                    call.sock.settimeout(default_timeout)
+            self.connection_pool.checkin(call, reuse=reuse)
+
+        return (resp.status, resp.reason, response_headers, response_body)
+
+    def close(self):
+        self.connection_pool.clear()
+
+    # Transport using urllib3, which needs to be installed separately
+class URLLib3Transport(Transport):
+    pool_manager = None
+    timeout = None
+
+    def __init__(self, host=None, port=None, is_https=True, maxsize=10, timeout=None, pool_manager=None):
+        super(URLLib3Transport, self).__init__(host=host, port=port, is_https=is_https)
+
+        import urllib3
+        self._urllib3 = urllib3
+
+        if pool_manager is None:
+            pool_manager = urllib3.PoolManager(maxsize=maxsize, block=True, retries=False)
+        self.pool_manager = pool_manager
+        self.timeout = timeout
+
+    def send(self, url_path, body, headers, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        if self.api_is_https:
+            scheme = 'https'
+        else:
+            scheme = 'http'
+        url = '{0}://{1}:{2}{3}'.format(scheme, self.api_host, self.api_port, url_path)
+
+        try:
+            resp = self.pool_manager.request('POST', url, body=body, headers=headers,
+                    timeout=timeout, retries=False, redirect=False)
+        except self._urllib3.exceptions.HTTPError as e:
+            raise trustly.exceptions.TrustlyConnectionError(str(e))
+
+        response_headers = dict([(name.lower(), value) for (name, value) in six.iteritems(resp.headers)])
+        return (resp.status, resp.reason, response_headers, resp.data)
+
+    def close(self):
+        self.pool_manager.clear()
+
+    # Transport that never touches the network. Responses are either queued
+    # with add_response() and returned in order, or produced by a handler
+    # function called as handler(url_path, body, headers) returning a
+    # (status, reason, headers, body) tuple. All requests sent are kept in
+    # self.requests as (url_path, body, headers) tuples. Primarily intended
+    # for tests and for benchmarking the client without network time.
+class MemoryTransport(Transport):
+    handler = None
+    requests = None
+
+    def __init__(self, host=None, port=None, is_https=True, handler=None):
+        super(MemoryTransport, self).__init__(host=host, port=port, is_https=is_https)
+
+        self.handler = handler
+        self.requests = []
+        self._responses = collections.deque()
+
+    def add_response(self, body, status=200, reason='OK', headers=None):
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        if headers is None:
+            headers = {}
+        self._responses.append((status, reason, headers, body))
+
+        # Return the body of the last request sent, None if nothing is sent
+    def last_body(self):
+        if len(self.requests) == 0:
+            return None
+        return self.requests[-1][1]
+
+    def send(self, url_path, body, headers, timeout=None):
+        self.requests.append((url_path, body, headers))
+
+        if self.handler is not None:
+            return self.handler(url_path, body, headers)
+
+        try:
+            return self._responses.popleft()
+        except IndexError:
+            raise trustly.exceptions.TrustlyConnectionError('No response queued in the memory transport')
+
+# vim: set et cindent ts=4 ts=4 sw=4:
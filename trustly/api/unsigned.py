@@ -35,9 +35,11 @@ class UnsignedAPI(trustly.api.api.API):
         # after successful new_session_cookie call.
     session_uuid = None
 
-    def __init__(self, username, password, host='trustly.com', port=443, is_https=True):
+    def __init__(self, username, password, host='trustly.com', port=443, is_https=True, connection_pool=None, transport=None,
+            trustly_publickey=None):
 
-        super(UnsignedAPI, self).__init__(host=host, port=port, is_https=is_https)
+        super(UnsignedAPI, self).__init__(host=host, port=port, is_https=is_https,
+                connection_pool=connection_pool, transport=transport, trustly_publickey=trustly_publickey)
 
         self.api_username = username
         self.api_password = password
@@ -46,7 +48,8 @@ class UnsignedAPI(trustly.api.api.API):
         return '/api/Legacy'
 
     def handle_response(self, request, httpcall):
-        return trustly.data.jsonrpcresponse.JSONRPCResponse(httpcall)
+        return trustly.data.jsonrpcresponse.JSONRPCResponse(httpcall,
+                lazy=self.lazy_responses, retain_body=self.retain_response_body)
 
     def insert_credentials(self, request):
         request.set_param('Username', self.api_username)
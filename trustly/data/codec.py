@@ -0,0 +1,168 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# JSON codecs for encoding requests and decoding responses and
+# notifications. The fastest installed of orjson, ujson and simplejson is
+# used, falling back on the json module of the standard library. A codec
+# can also be pinned with set_codec(). All codecs emit compact JSON
+# (no whitespace after separators).
+#
+# Whatever the codec, the decoded data must be identical to what json
+# would give, as the signatures are computed over the serialization of it.
+
+from __future__ import absolute_import
+import json
+
+import trustly.registry
+
+class Codec(object):
+        # Name of the codec in the registry
+    name = None
+
+        # Return the JSON text (str) of data
+    def dumps(self, data):
+        raise NotImplementedError()
+
+        # Return the data of the JSON text or UTF-8 encoded bytes s. Raises
+        # ValueError if s is not valid JSON.
+    def loads(self, s):
+        raise NotImplementedError()
+
+class StdlibCodec(Codec):
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def dumps(self, data):
+        return self._encoder.encode(data)
+
+    def loads(self, s):
+        if isinstance(s, bytes):
+            s = s.decode('utf-8')
+        return json.loads(s)
+
+    # orjson decodes integers outside of the 64 bit range as floats, which
+    # would change their serialization. Texts that might hold such (a run of
+    # 19 digits, -9223372036854775809 is out of range) are decoded with json
+    # instead. Mapping all digits to 0 and searching for the run is several
+    # times faster than a regular expression.
+_digit_table = bytes(bytearray([0x30 if 0x30 <= i <= 0x39 else 0x20 for i in range(256)]))
+_big_integer = b'0' * 19
+
+class OrjsonCodec(Codec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._fallback = StdlibCodec()
+
+    def dumps(self, data):
+        try:
+            return self._orjson.dumps(data, option=self._orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+                # Values orjson does not handle (like integers over 64 bits)
+            return self._fallback.dumps(data)
+
+    def loads(self, s):
+        if not isinstance(s, bytes):
+            s = s.encode('utf-8')
+        if s.translate(_digit_table).find(_big_integer) >= 0:
+            return self._fallback.loads(s)
+        return self._orjson.loads(s)
+
+class UJSONCodec(Codec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+        self._fallback = StdlibCodec()
+
+    def dumps(self, data):
+        try:
+            return self._ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            return self._fallback.dumps(data)
+
+    def loads(self, s):
+        return self._ujson.loads(s)
+
+class SimpleJSONCodec(Codec):
+    name = 'simplejson'
+
+    def __init__(self):
+        import simplejson
+        self._simplejson = simplejson
+
+    def dumps(self, data):
+        return self._simplejson.dumps(data, separators=(',', ':'))
+
+    def loads(self, s):
+        if isinstance(s, bytes):
+            s = s.decode('utf-8')
+        return self._simplejson.loads(s)
+
+    # Codec classes by name, in order of preference. json is always
+    # available and kept last.
+_codecs = trustly.registry.Registry([
+    ('orjson', OrjsonCodec),
+    ('ujson', UJSONCodec),
+    ('simplejson', SimpleJSONCodec),
+    ('json', StdlibCodec),
+    ], fallback='json', missing='No JSON library found')
+
+    # Add a codec class (or other callable returning a Codec) to the
+    # registry. Unless prefer is true it is only used when pinned with
+    # set_codec().
+def register_codec(name, factory, prefer=False):
+    _codecs.register(name, factory, prefer)
+
+    # Return the codec registered under name, raises ImportError if the
+    # library it needs is not installed and KeyError for unknown names
+def get_codec(name=None):
+    return _codecs.get(name)
+
+    # Return the names of the registered codecs that can be used
+def available_codecs():
+    return _codecs.available()
+
+    # Return the codec in use, the first usable one of the registry unless
+    # one has been pinned with set_codec()
+def default_codec():
+    return _codecs.default()
+
+    # Pin the codec to use, either a Codec or the name of a registered
+    # codec. None reverts to automatic selection. Returns the codec.
+def set_codec(codec):
+    return _codecs.set(codec)
+
+def dumps(data):
+    return default_codec().dumps(data)
+
+def loads(s):
+    return default_codec().loads(s)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
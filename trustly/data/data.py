@@ -27,42 +27,124 @@ import json
 import types
 import six
 
+try:
+    MappingProxyType = types.MappingProxyType
+except AttributeError:
+    MappingProxyType = None
+
+import trustly.data.codec
+import trustly.data.vacuum
+
+    # Values that are compared rather than assumed changed when a key is
+    # assigned, containers might have been modified in place by the caller.
+_scalar_types = (six.text_type, six.binary_type, float, bool, type(None)) + six.integer_types
+
+    # Read-only sequence over a list, without copying it
+class ListView(object):
+    __slots__ = ('_list', )
+
+    def __init__(self, data):
+        self._list = data
+
+    def __getitem__(self, index):
+        return self._list[index]
+
+    def __len__(self):
+        return len(self._list)
+
+    def __iter__(self):
+        return iter(self._list)
+
+    def __contains__(self, value):
+        return value in self._list
+
+    def __eq__(self, other):
+        if isinstance(other, ListView):
+            other = other._list
+        return self._list == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'ListView({0!r})'.format(self._list)
+
+    # Return a read-only view of the dict or list data without copying it.
+    # Dicts are wrapped in a types.MappingProxyType (copied on python
+    # versions without it), lists in a ListView, other values are returned as
+    # they are. Like the copies returned by the get methods this is shallow,
+    # the values in the view are the ones of the payload.
+def view(data):
+    if type(data) is dict:
+        if MappingProxyType is None:
+            return data.copy()
+        return MappingProxyType(data)
+    elif type(data) is list:
+        return ListView(data)
+    return data
+
+    # The classes of the data hierarchy use __slots__ to keep the footprint of
+    # the (potentially many) request and response objects in flight down.
+    # Subclasses declare the attributes they add in their own __slots__ (or
+    # leave __slots__ out to get a __dict__) and set them in __init__, there
+    # are no class level defaults.
 class Data(object):
-    payload = None
+    __slots__ = (
+        'payload',
+            # Values derived from the payload (JSON encoding, signature
+            # plaintext digests etc), dropped whenever the payload changes.
+        '_cache',
+            # The payload the cached values were computed from
+        '_cache_payload',
+        '__weakref__',
+        )
 
     def __init__(self):
         self.payload = {}
+        self._cache = None
+        self._cache_payload = None
+
+        # Return the value cached under key, calling factory() to compute it
+        # if the payload has changed since it was last cached. The value is
+        # taken to describe the payload as factory() leaves it. Modifications
+        # made through the setters of the class are tracked, code modifying
+        # the payload structures directly must call invalidate().
+    def cached(self, key, factory):
+        cache = self._cache
+        if cache is not None and self._cache_payload is self.payload:
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+
+        value = factory()
+        if self._cache is None or self._cache_payload is not self.payload:
+            self._cache = {}
+            self._cache_payload = self.payload
+        self._cache[key] = value
+        return value
 
-        # Vacuum out all keys being set to None in the data to be communicated
-    def vacuum(self, data):
-        if type(data) == list:
-            ret = list()
-            for k in data:
-                if k is not None:
-                    v = self.vacuum(k)
-                    if v is not None:
-                        ret.append(v)
-
-            if len(ret) == 0:
-                return None
-
-            return ret
-
-        elif type(data) == dict:
-            ret = dict()
-            for (k, v) in six.iteritems(data):
-                if v is not None:
-                    v = self.vacuum(v)
-                    if v is not None:
-                        ret[k] = v
-
-            if len(ret) == 0:
-                return None
-
-            return ret
-        else:
-            return data
+        # Drop all values cached from the payload
+    def invalidate(self):
+        self._cache = None
+        self._cache_payload = None
+
+        # Set container[name] to value, invalidating the cached values unless
+        # this replaced a scalar with an equal one.
+    def _assign(self, container, name, value):
+        if self._cache is not None:
+            if type(value) not in _scalar_types or name not in container or \
+                    type(container[name]) is not type(value) or container[name] != value:
+                self.invalidate()
+        container[name] = value
+        return value
 
+        # Vacuum out all keys being set to None in the data to be communicated,
+        # see trustly.data.vacuum.vacuum(). Structures without None values are
+        # returned as they are, with inplace the containers are pruned in
+        # place rather than copied.
+    def vacuum(self, data, inplace=False):
+        return trustly.data.vacuum.vacuum(data, inplace=inplace)
 
         # Fetch given key from the payload to be sent, will raise KeyError if
         # key is not present in the payload. Not providing key will return a
@@ -73,20 +155,27 @@ class Data(object):
         else:
             return self.payload.copy()
 
+        # Return a read-only view of the payload, see view()
+    def get_view(self):
+        return view(self.payload)
+
         # Set a key in the payload to a given value
     def set(self, name, value):
-        self.payload[name] = value
-        return value
+        return self._assign(self.payload, name, value)
 
     def pop(self, name):
+        if name in self.payload:
+            self.invalidate()
         return self.payload.pop(name, None)
 
-        # Return a JSON representation (UTF-8) of the payoad
+        # Return a JSON representation (UTF-8) of the payoad. The encoding is
+        # cached until the payload is modified. The compact encoding is done
+        # with the codec of trustly.data.codec, pretty printing with json.
     def json(self, pretty=False):
-        data = self.get()
         if pretty:
-            return json.dumps(data, ensure_ascii=False, sort_keys=True, indent=4, separators=(',', ': '))
+            return self.cached('json-pretty', lambda: json.dumps(self.payload, ensure_ascii=False,
+                sort_keys=True, indent=4, separators=(',', ': ')))
         else:
-            return json.dumps(data)
+            return self.cached('json', lambda: trustly.data.codec.dumps(self.payload))
 
 # vim: set et cindent ts=4 ts=4 sw=4:
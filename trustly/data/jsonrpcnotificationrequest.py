@@ -23,20 +23,19 @@ THE SOFTWARE.
 """
 
 from __future__ import absolute_import
-import json
 
-import trustly.data
+import trustly.data.codec
+import trustly.data.data
 
 class JSONRPCNotificationRequest(trustly.data.data.Data):
-
-    notification_body = None
+    __slots__ = ('notification_body', )
 
     def __init__(self, notification_body):
         super(JSONRPCNotificationRequest, self).__init__()
 
         self.notification_body = notification_body
         try:
-            payload = json.loads(self.notification_body)
+            payload = trustly.data.codec.loads(self.notification_body)
             if payload is not None:
                 self.payload = payload
         except ValueError as e:
@@ -73,6 +72,17 @@ class JSONRPCNotificationRequest(trustly.data.data.Data):
 
         return None
 
+        # Return read-only views of params and params.data (see
+        # trustly.data.data.view()), None if not present
+    def get_params_view(self):
+        return trustly.data.data.view(self.payload.get('params'))
+
+    def get_data_view(self):
+        params = self.payload.get('params')
+        if params is None:
+            return None
+        return trustly.data.data.view(params.get('data'))
+
     def get_uuid(self):
         try:
             return self.get_params('uuid')
@@ -26,6 +26,7 @@ from __future__ import absolute_import
 import trustly.data.data
 
 class JSONRPCNotificationResponse(trustly.data.data.Data):
+    __slots__ = ()
 
     def __init__(self, request, success=None):
         super(JSONRPCNotificationResponse, self).__init__()
@@ -59,8 +60,8 @@ class JSONRPCNotificationResponse(trustly.data.data.Data):
 
     def set_result(self, name, value):
         if self.payload.get('result') is None:
-            self.payload['result'] = dict()
-        self.payload['result'][name] = value
+            self.set('result', dict())
+        self._assign(self.payload['result'], name, value)
 
     def get_result(self, name=None):
         result = self.payload.get('result')
@@ -78,15 +79,13 @@ class JSONRPCNotificationResponse(trustly.data.data.Data):
     def set_data(self, name, value):
         result = self.payload.get('result')
         if result is None:
-            self.payload['result'] = dict(result=dict(data=dict()))
+            result = self.set('result', dict())
 
         data = result.get('data')
         if data is None:
-            result['data'] = dict()
-            data = result['data']
+            data = self._assign(result, 'data', dict())
 
-        data[name] = value
-        return value
+        return self._assign(data, name, value)
 
 
     def get_data(self, name=None):
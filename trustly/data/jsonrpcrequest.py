@@ -25,10 +25,11 @@ THE SOFTWARE.
 from __future__ import absolute_import
 import types
 
+import trustly.data.data
 import trustly.data.request
 
 class JSONRPCRequest(trustly.data.request.Request):
-    payload = None
+    __slots__ = ()
 
         # Initialize a new JSON RPC request data structure. Provide data and
         # attributes as needed for the call. If not provided they can later be
@@ -56,7 +57,7 @@ class JSONRPCRequest(trustly.data.request.Request):
             if attributes is not None:
                 payload['params']['Data']['Attributes'] = attributes
 
-            self.payload = self.vacuum(payload)
+            self.payload = trustly.data.request.copy_containers(self.vacuum(payload))
 
             # We do not relay the method in the super call as for the JSON RPC
             # we keep this value in the payload and manage it ourself.
@@ -73,11 +74,14 @@ class JSONRPCRequest(trustly.data.request.Request):
 
         # Set a value in payload.params.NAME
     def set_param(self, name, value):
-        self.payload['params'][name] = value
+        return self._assign(self.payload['params'], name, value)
 
         # Fetch and clear value in payload.params.NAME
     def pop_param(self, name):
-        return self.payload.get('params').pop(name, None)
+        params = self.payload.get('params')
+        if name in params:
+            self.invalidate()
+        return params.pop(name, None)
 
         # Return a value from payload.params.NAME, will raise KeyError if name
         # is not present in params.
@@ -130,13 +134,18 @@ class JSONRPCRequest(trustly.data.request.Request):
         else:
             return data[name]
 
+        # Return a read-only view of payload.params.Data (see
+        # trustly.data.data.view()), None if Data is not defined
+    def get_data_view(self):
+        return trustly.data.data.view(self.payload['params'].get('Data'))
+
         # Set a new value for payload.params.Data.name
     def set_data(self, name, value):
         if name is not None:
             if self.payload['params'].get('Data') is None:
-                self.payload['params']['Data'] = {}
+                self.set_param('Data', {})
 
-            self.payload['params']['Data'][name] = value
+            self._assign(self.payload['params']['Data'], name, value)
 
         return value
 
@@ -165,12 +174,12 @@ class JSONRPCRequest(trustly.data.request.Request):
     def set_attribute(self, name, value):
         if name is not None:
             if self.payload['params'].get('Data') is None:
-                self.payload['params']['Data'] = {}
+                self.set_param('Data', {})
 
             if self.payload['params']['Data'].get('Attributes') is None:
-                self.payload['params']['Data']['Attributes'] = {}
+                self.set_data('Attributes', {})
 
-            self.payload['Data']['Attributes'][name] = value
+            self._assign(self.payload['params']['Data']['Attributes'], name, value)
 
         return value
 
@@ -29,16 +29,17 @@ import trustly.data.response
 import trustly.exceptions
 
 class JSONRPCResponse(trustly.data.response.Response):
+    __slots__ = ()
 
         # Intialize a JSON RPC response from the result of a httplib call (not
         # yet read). The JSON Response from the call will be read and stored,
         # see trustly.data.Reponse for details on the response data stored. 
         # JSONRPCResponse additionally defines self.result wich will point to
         # the result structure for the call. 
-    def __init__(self, call):
-        super(JSONRPCResponse, self).__init__(call=call)
+    def __init__(self, call, lazy=False, retain_body=None):
+        super(JSONRPCResponse, self).__init__(call=call, lazy=lazy, retain_body=retain_body)
 
-        version = self.get('version')
+        version = self.payload.get('version')
 
         if version != '1.1':
             raise trustly.exceptions.TrustlyJSONRPCVersionError('JSON RPC Version {0} is not supported'.format(version))
@@ -72,7 +73,7 @@ class JSONRPCResponse(trustly.data.response.Response):
     def get_error_code(self):
         if self.is_error():
             try:
-                return self.response_result.get['code']
+                return self.response_result.get('code')
             except KeyError as e:
                 return None
             except:
@@ -85,7 +86,7 @@ class JSONRPCResponse(trustly.data.response.Response):
     def get_error_message(self):
         if self.is_error():
             try:
-                return self.response_result.get['message']
+                return self.response_result.get('message')
             except KeyError as e:
                 return None
             except:
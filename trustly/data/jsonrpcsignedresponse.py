@@ -26,18 +26,20 @@ from __future__ import absolute_import
 import types
 import copy
 
+import trustly.data.data
 import trustly.data.jsonrpcresponse
 import trustly.exceptions
 
 class JSONRPCSignedResponse(trustly.data.jsonrpcresponse.JSONRPCResponse):
+    __slots__ = ()
 
         # Intialize a JSON RPC response from the result of a httplib call (not
         # yet read). The JSON Response from the call will be read and stored,
         # see trustly.data.Reponse for details on the response data stored. 
         # JSONRPCResponse additionally defines self.result wich will point to
         # the result structure for the call. 
-    def __init__(self, call):
-        super(JSONRPCSignedResponse, self).__init__(call=call)
+    def __init__(self, call, lazy=False, retain_body=None):
+        super(JSONRPCSignedResponse, self).__init__(call=call, lazy=lazy, retain_body=retain_body)
 
         # A signed JSON RPC Error result basically looks like this:
         # {
@@ -119,4 +121,9 @@ class JSONRPCSignedResponse(trustly.data.jsonrpcresponse.JSONRPCResponse):
         else:
             return data[name]
 
+        # Return a read-only view of the result data (see
+        # trustly.data.data.view()), None if there is no data
+    def get_data_view(self):
+        return trustly.data.data.view(self.response_result.get('data'))
+
 # vim: set et cindent ts=4 ts=4 sw=4:
@@ -26,16 +26,19 @@ from __future__ import absolute_import
 import trustly.data
 
 class Request(trustly.data.data.Data):
-
-    method = None
+    __slots__ = ('method', )
 
         # Initialize the data class using a full payload structure. Payload if
         # provided should be a dictionary formatted as the request should be. 
+        # The payload is vacuumed. The containers the request modifies
+        # (payload, params, Data and Attributes) are copied, nested values
+        # below them are only copied where they hold None values.
     def __init__(self, method=None, payload=None):
         super(Request, self).__init__()
+        self.method = None
 
         if payload is not None:
-            self.payload = self.vacuum(payload)
+            self.payload = copy_containers(self.vacuum(payload))
 
         if method is not None:
             self.method = method
@@ -61,4 +64,32 @@ class Request(trustly.data.data.Data):
         self.set('uuid', uuid)
         return uuid
 
+def _copy(value):
+    if isinstance(value, dict):
+        return value.copy()
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+    # Return payload with shallow copies of the payload, params, Data and
+    # Attributes containers, so setting values in the request never touches
+    # structures owned by the caller
+def copy_containers(payload):
+    payload = _copy(payload)
+    if not isinstance(payload, dict):
+        return payload
+
+    params = _copy(payload.get('params'))
+    if isinstance(params, dict):
+        payload['params'] = params
+        data = _copy(params.get('Data'))
+        if isinstance(data, dict):
+            params['Data'] = data
+            attributes = _copy(data.get('Attributes'))
+            if isinstance(attributes, dict):
+                data['Attributes'] = attributes
+        elif data is not None:
+            params['Data'] = data
+    return payload
+
 # vim: set et cindent ts=4 ts=4 sw=4:
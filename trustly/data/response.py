@@ -23,22 +23,24 @@ THE SOFTWARE.
 """
 
 from __future__ import absolute_import
-import json
 import types
-import pprint
 
+import trustly.data.codec
 import trustly.data.data
 import trustly.exceptions
 
 class Response(trustly.data.data.Data):
-        # http response code and status from the actual call
-    response_status = None
-    response_reason = None
-        # Full response body as read raw from the connection
-    response_body = None
-        # Shortcut to the result part of the response, will be pointed to the
-        # data guts correctly for both errors and proper results respectivly
-    response_result = None
+    __slots__ = (
+            # http response code and status from the actual call
+        'response_status',
+        'response_reason',
+            # Full response body as read raw from the connection
+        'response_body',
+            # Shortcut to the result part of the response, will be pointed to
+            # the data guts correctly for both errors and proper results
+            # respectivly
+        'response_result',
+        )
 
         # Build a new response data object using the (not yet read) response
         # from a httplib call. JSON data from the call will be set in
@@ -49,8 +51,15 @@ class Response(trustly.data.data.Data):
         # raised. In this case the payload and response_body will not be
         # defined, response_status and response_reason will however be set to
         # the corresponding http responses
-    def __init__(self, call):
+        # With lazy the raw response_body is released once the response is
+        # parsed, unless retain_body is true. The whole response is still
+        # decoded up front with trustly.data.codec.
+    def __init__(self, call, lazy=False, retain_body=None):
         super(Response, self).__init__()
+        self.response_result = None
+
+        if retain_body is None:
+            retain_body = not lazy
 
         resp = call.getresponse()
 
@@ -60,7 +69,7 @@ class Response(trustly.data.data.Data):
         self.response_body = resp.read()
 
         try:
-            payload = json.loads(self.response_body)
+            payload = trustly.data.codec.loads(self.response_body)
             if payload is not None:
                 self.payload = payload
         except ValueError as e:
@@ -72,18 +81,22 @@ class Response(trustly.data.data.Data):
             else:
                 raise trustly.exceptions.TrustlyDataError(str(e))
 
+        if not retain_body:
+            self.response_body = None
+
         try:
-            self.response_result = self.get('result')
+            self.response_result = self.payload['result']
         except KeyError as e:
             pass
 
         if self.response_result is None:
             try:
-                self.response_result = self.get('error')
+                self.response_result = self.payload['error']
             except KeyError as e:
                 pass
 
         if self.response_result is None:
+            import pprint
             raise trustly.exceptions.TrustlyDataError('No result or error in response {0}'.format(pprint.pformat(self.payload)))
 
         # Reveal wether or not the call resulted in an error. This will reveal the
@@ -91,7 +104,7 @@ class Response(trustly.data.data.Data):
         # call failed, check out self.response_code for the http response code.
     def is_error(self):
         try:
-            if self.get('error') is not None:
+            if self.payload['error'] is not None:
                 return True
         except KeyError as e:
             return False
@@ -101,7 +114,7 @@ class Response(trustly.data.data.Data):
         # call failed, check out self.response_code for the http response code.
     def is_success(self):
         try:
-            if self.get('result') is not None:
+            if self.payload['result'] is not None:
                 return True
         except KeyError as e:
             return False
@@ -145,4 +158,9 @@ class Response(trustly.data.data.Data):
             else: 
                 return self.response_result
 
+        # Return a read-only view of the result part of the response
+        # structure, see trustly.data.data.view()
+    def get_result_view(self):
+        return trustly.data.data.view(self.response_result)
+
 # vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,201 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Removal of None values from the data structures sent to the API, see
+# trustly.data.data.Data.vacuum(). None values are removed from dicts and
+# lists, as are dicts and lists left empty by this. Only exact dict and list
+# types are walked, anything else is a value.
+#
+# Deeply nested structures are walked with an explicit stack, so they can
+# be vacuumed without hitting the recursion limit. Containers are only
+# copied on write:
+# containers without anything to remove are returned as they are, shared
+# with the input. With inplace containers are pruned in place instead of
+# being copied.
+
+from __future__ import absolute_import
+import six
+
+    # Marker for removed entries in the changes of a frame
+_REMOVED = object()
+
+    # Walk state of a container: [container, iterator over (key, value),
+    # changes (dict mapping key to new value or _REMOVED, None until the
+    # first change), number of removed entries, key of the child being
+    # walked]
+def _frame(data):
+    if type(data) is dict:
+        return [data, six.iteritems(data), None, 0, None]
+    return [data, enumerate(data), None, 0, None]
+
+def _apply(data, changes, inplace):
+    if type(data) is dict:
+        if inplace:
+            for (k, v) in six.iteritems(changes):
+                if v is _REMOVED:
+                    del data[k]
+                else:
+                    data[k] = v
+            return data
+
+        ret = {}
+        for (k, v) in six.iteritems(data):
+            v = changes.get(k, v)
+            if v is not _REMOVED:
+                ret[k] = v
+        return ret
+
+    ret = []
+    for (i, v) in enumerate(data):
+        v = changes.get(i, v)
+        if v is not _REMOVED:
+            ret.append(v)
+    if inplace:
+        data[:] = ret
+        return data
+    return ret
+
+    # Nesting depth up to which structures are walked recursively, deeper
+    # structures are walked with an explicit stack. Recursion is faster for
+    # the shallow structures of the API.
+MAX_RECURSION_DEPTH = 64
+
+def _walk(data, inplace, depth):
+    if depth > MAX_RECURSION_DEPTH:
+        return _walk_iterative(data, inplace)
+
+        # ret stays None while nothing has changed, at the first change it
+        # is started from a copy of the container
+    ret = None
+    if type(data) is dict:
+            # Deleting and replacing keys of the copy keeps the key order
+        for (k, v) in six.iteritems(data):
+            if v is None:
+                if ret is None:
+                    ret = data.copy()
+                del ret[k]
+                continue
+
+            t = type(v)
+            if t is dict or t is list:
+                v2 = _walk(v, inplace, depth + 1)
+                if v2 is not v:
+                    if ret is None:
+                        ret = data.copy()
+                    if v2 is None:
+                        del ret[k]
+                    else:
+                        ret[k] = v2
+
+        if ret is None:
+            return data if data else None
+        if inplace and ret:
+            data.clear()
+            data.update(ret)
+            return data
+    else:
+        i = 0
+        for v in data:
+            if v is not None:
+                t = type(v)
+                if t is dict or t is list:
+                    v2 = _walk(v, inplace, depth + 1)
+                    if v2 is not v:
+                        if ret is None:
+                            ret = data[:i]
+                        if v2 is not None:
+                            ret.append(v2)
+                        i += 1
+                        continue
+                if ret is not None:
+                    ret.append(v)
+            elif ret is None:
+                ret = data[:i]
+            i += 1
+
+        if ret is None:
+            return data if data else None
+        if inplace and ret:
+            data[:] = ret
+            return data
+
+    return ret if ret else None
+
+def _walk_iterative(data, inplace):
+    stack = [_frame(data)]
+    while True:
+        frame = stack[-1]
+        child = None
+        for (k, v) in frame[1]:
+            if v is None:
+                if frame[2] is None:
+                    frame[2] = {}
+                frame[2][k] = _REMOVED
+                frame[3] += 1
+                continue
+
+            t = type(v)
+            if t is dict or t is list:
+                frame[4] = k
+                child = v
+                break
+
+        if child is not None:
+            stack.append(_frame(child))
+            continue
+
+            # All entries of the container are done
+        stack.pop()
+        (node, items, changes, removed, key) = frame
+        if removed == len(node):
+            ret = None
+        elif changes is None:
+            ret = node
+        else:
+            ret = _apply(node, changes, inplace)
+
+        if not stack:
+            return ret
+
+        parent = stack[-1]
+        if ret is not node:
+            if parent[2] is None:
+                parent[2] = {}
+            if ret is None:
+                parent[2][parent[4]] = _REMOVED
+                parent[3] += 1
+            else:
+                parent[2][parent[4]] = ret
+
+    # Return data with all None values removed. Containers without any None
+    # values are not copied. If inplace is true containers are pruned in
+    # place instead of copied, the input is modified and only empty
+    # containers are replaced (by None).
+def vacuum(data, inplace=False):
+    t = type(data)
+    if t is not dict and t is not list:
+        return data
+    return _walk(data, inplace, 0)
+
+# vim: set et cindent ts=4 ts=4 sw=4:
@@ -0,0 +1,127 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2014 Trustly Group AB
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Registry of interchangeable implementations of a component (such as the
+# JSON codecs of trustly.data.codec or the RSA backends of
+# trustly.api.cryptobackend) that depend on optional libraries. The first
+# implementation of the registry whose library is installed is used unless
+# one has been pinned with set().
+
+from __future__ import absolute_import
+import threading
+
+import six
+
+class Registry(object):
+        # (name, factory) tuples in order of preference
+    entries = None
+        # Name of the entry kept last, registered entries are added before it
+    fallback = None
+
+        # entries is a list of (name, factory) tuples in order of
+        # preference, where factory is a callable returning the
+        # implementation and raising ImportError if the library it needs is
+        # missing. missing is the message of the ImportError raised when none
+        # can be used.
+    def __init__(self, entries, fallback=None, missing='No implementation found'):
+        self.entries = list(entries)
+        self.fallback = fallback
+        self.missing = missing
+        self._lock = threading.Lock()
+        self._instances = {}
+        self._current = None
+        self._pinned = False
+
+        # Add a factory to the registry. Unless prefer is true it is only
+        # used when pinned with set() or when none of the others can be used.
+    def register(self, name, factory, prefer=False):
+        with self._lock:
+            for (i, (n, f)) in enumerate(self.entries):
+                if n == name:
+                    del self.entries[i]
+                    break
+            if prefer:
+                self.entries.insert(0, (name, factory))
+            elif self.entries and self.entries[-1][0] == self.fallback:
+                self.entries.insert(len(self.entries) - 1, (name, factory))
+            else:
+                self.entries.append((name, factory))
+            self._instances.pop(name, None)
+            if not self._pinned:
+                self._current = None
+
+        # Return the implementation registered under name, raises ImportError
+        # if the library it needs is not installed and KeyError for unknown
+        # names
+    def get(self, name=None):
+        if name is None:
+            return self.default()
+
+        instance = self._instances.get(name)
+        if instance is None:
+            factory = dict(self.entries)[name]
+            instance = factory()
+            with self._lock:
+                self._instances[name] = instance
+        return instance
+
+        # Return the names of the registered implementations that can be used
+    def available(self):
+        ret = []
+        for (name, factory) in list(self.entries):
+            try:
+                self.get(name)
+            except ImportError:
+                continue
+            ret.append(name)
+        return ret
+
+        # Return the implementation in use, the first usable one of the
+        # registry unless one has been pinned with set()
+    def default(self):
+        instance = self._current
+        if instance is None:
+            instance = self.set(None)
+        return instance
+
+        # Pin the implementation to use, either an implementation or the name
+        # of a registered one. None reverts to automatic selection. Returns
+        # the implementation. Raises ImportError if none can be used.
+    def set(self, instance):
+        self._pinned = instance is not None
+        if instance is None:
+            for (name, factory) in list(self.entries):
+                try:
+                    instance = self.get(name)
+                except ImportError:
+                    continue
+                break
+            else:
+                raise ImportError(self.missing)
+        elif isinstance(instance, six.string_types):
+            instance = self.get(instance)
+        self._current = instance
+        return instance
+
+# vim: set et cindent ts=4 ts=4 sw=4: